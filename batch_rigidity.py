@@ -0,0 +1,220 @@
+"""Headless batch rigidity checking. Requires numpy and scipy.
+
+Reads graphs from graph6, sparse6, edge list or adjacency dictionary files and writes one JSON line per graph.
+Example:
+    python batch_rigidity.py graphs.g6 --dimension 2 --workers 8 --output results.jsonl"""
+
+import argparse
+import ast
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+from graph_codec import adjacency_list_from_graph6, graph6_size
+from rigidity_checker import GlobalRigidityChecker
+
+FORMATS = ("auto", "graph6", "sparse6", "edgelist", "dict")
+
+
+def _empty_graph(n):
+    return {vertex: set() for vertex in range(n)}
+
+
+def read_graph6(line):
+    """Adjacency list of a graph6 string."""
+    return adjacency_list_from_graph6(line)
+
+
+def read_sparse6(line):
+    """Adjacency list of a sparse6 string. Loops and repeated edges are dropped."""
+    if line.startswith(">>sparse6<<"):
+        line = line[len(">>sparse6<<"):]
+    n, data = graph6_size([ord(c) - 63 for c in line.lstrip(":;")])
+    graph_dict = _empty_graph(n)
+    k = max(1, (n - 1).bit_length())
+    bits = "".join(f"{byte:06b}" for byte in data)
+    v = 0
+    position = 0
+    while position + k + 1 <= len(bits):
+        b = bits[position]
+        x = int(bits[position + 1:position + k + 1], 2)
+        position += k + 1
+        if b == "1":
+            v += 1
+        if x >= n or v >= n:
+            break
+        elif x > v:
+            v = x
+        elif x != v:
+            graph_dict[x].add(v)
+            graph_dict[v].add(x)
+    return graph_dict
+
+
+def read_dict(line):
+    """Adjacency list printed by the graph builder, e.g. 'Adjacency list: {0: {1}, 1: {0}, 2: set()}.'"""
+    line = line.strip()
+    if line.startswith("Adjacency list:"):
+        line = line[len("Adjacency list:"):]
+    line = line.strip().rstrip(".").replace("set()", "[]")
+    return {int(vertex): set(neighbours) for vertex, neighbours in ast.literal_eval(line).items()}
+
+
+def read_edge_list(lines):
+    """Adjacency list of an edge list given as lines 'u v'.
+    Vertices are relabelled 0,...,n-1 in order of first appearance."""
+    labels = {}
+    edges = []
+    for line in lines:
+        u, v = line.split()[:2]
+        for vertex in (u, v):
+            labels.setdefault(vertex, len(labels))
+        edges.append((labels[u], labels[v]))
+    graph_dict = _empty_graph(len(labels))
+    for u, v in edges:
+        if u != v:
+            graph_dict[u].add(v)
+            graph_dict[v].add(u)
+    return graph_dict
+
+
+def _line_format(line):
+    if line.startswith(":") or line.startswith(";") or line.startswith(">>sparse6<<"):
+        return "sparse6"
+    if (line.startswith("{") and ":" in line) or line.startswith("Adjacency list:"):
+        return "dict"
+    if len(line.split()) >= 2:
+        return "edgelist"
+    return "graph6"
+
+
+def read_graphs(stream, graph_format="auto"):
+    """Generator of adjacency lists, one graph at a time, so memory does not grow with the input.
+    graph6, sparse6 and dict inputs have one graph per line.
+    Edge lists have one edge per line and graphs separated by blank lines.
+    With graph_format 'auto' the format is guessed from each line."""
+    block = []
+    for line in stream:
+        line = line.strip()
+        if line.startswith("#"):
+            continue
+        line_format = _line_format(line) if graph_format == "auto" and line else graph_format
+        if line_format == "edgelist" and line:
+            block.append(line)
+            continue
+        if block:
+            yield read_edge_list(block)
+            block = []
+        if not line:
+            continue
+        if line_format == "graph6":
+            yield read_graph6(line)
+        elif line_format == "sparse6":
+            yield read_sparse6(line)
+        elif line_format == "dict":
+            yield read_dict(line)
+    if block:
+        yield read_edge_list(block)
+
+
+def check_graph(graph_dict, dimension, prime=None):
+    """Runs the global rigidity and graph number computations on one graph. All the flags come from the single
+    global rigidity check, and so from the same placement.
+    Returns a record with the results and the time in seconds spent on each. The graph number is written as a hex
+    string, since json cannot write integers of more than 4300 digits."""
+    graph = GlobalRigidityChecker(graph_dict, dimension)
+    timings = {}
+    start = time.perf_counter()
+    graph.compute_global_rigidity(prime=prime)
+    globally_rigid = None if graph.globally_rigid_test_fail else graph.globally_rigid
+    timings["global_rigidity"] = time.perf_counter() - start
+    start = time.perf_counter()
+    graph_number = graph.graph_number()
+    timings["graph_number"] = time.perf_counter() - start
+    return {"n": graph.number_of_vertices(), "m": graph.number_of_edges(), "dimension": dimension,
+            "independent": bool(graph.independent), "rigid": bool(graph.rigid),
+            "globally_rigid": globally_rigid, "graph_number": format(graph_number, "x"), "timings": timings}
+
+
+def check_chunk(chunk, dimension, prime=None):
+    """Checks a list of (index, adjacency list) pairs in one worker call.
+    A graph whose check raises gets a record with the error instead, so it does not take the rest of the batch down."""
+    records = []
+    for index, graph_dict in chunk:
+        try:
+            record = check_graph(graph_dict, dimension, prime)
+        except Exception as error:
+            record = {"n": len(graph_dict), "dimension": dimension, "error": f"{type(error).__name__}: {error}"}
+        record["index"] = index
+        records.append(record)
+    return records
+
+
+def _seed_worker():
+    """Reseeds both random number generators in a new worker, which would otherwise inherit their states from the
+    parent and draw the same placements and stresses as every other worker."""
+    np.random.seed()
+    random.seed()
+
+
+def run_batch(graphs, dimension, workers=None, chunksize=64, prime=None):
+    """Generator of result records, in input order.
+    Graphs are sent to a process pool in chunks of chunksize, with at most two chunks per worker in flight,
+    so only a bounded number of graphs are held in memory at any time."""
+    indexed = enumerate(graphs)
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        while True:
+            chunk = list(islice(indexed, chunksize))
+            if not chunk:
+                return
+            yield from check_chunk(chunk, dimension, prime)
+    with ProcessPoolExecutor(workers, initializer=_seed_worker) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(islice(indexed, chunksize))
+                if not chunk:
+                    break
+                pending.append(executor.submit(check_chunk, chunk, dimension, prime))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the rigidity of many graphs without the graph builder.")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="input files, '-' for standard input")
+    parser.add_argument("--format", choices=FORMATS, default="auto", help="input format (default: auto)")
+    parser.add_argument("--dimension", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=64, help="graphs sent to a worker at a time")
+    parser.add_argument("--prime", type=int, default=None, help="use the exact modular backend with this prime")
+    parser.add_argument("--output", default="-", help="output JSONL file, '-' for standard output")
+    args = parser.parse_args(argv)
+
+    def graphs():
+        for path in args.inputs:
+            if path == "-":
+                yield from read_graphs(sys.stdin, args.format)
+            else:
+                with open(path) as stream:
+                    yield from read_graphs(stream, args.format)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for record in run_batch(graphs(), args.dimension, args.workers, args.chunksize, args.prime):
+            output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Benchmarks for the rigidity, stress and spectrum computations. Requires numpy and scipy.
+
+Times each stage on deterministic graph families across sizes and dimensions, records peak memory,
+and can save the results as a JSON baseline or compare them against one.
+Example:
+    python benchmark_rigidity.py --sizes 10 20 40 --dimensions 2 3 --save baseline.json
+    python benchmark_rigidity.py --sizes 10 20 40 --dimensions 2 3 --compare baseline.json
+Run with --check to test the global rigidity answers on graphs whose answers are known instead."""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from rigidity_checker import GlobalRigidityChecker
+from pebble_game import PebbleGame
+from small_graph_batch import batch_global_rigidity
+
+
+def _empty_graph(n):
+    return {vertex: set() for vertex in range(n)}
+
+
+def _join(graph_dict, u, v):
+    graph_dict[u].add(v)
+    graph_dict[v].add(u)
+
+
+def laman_graph(n, seed=0):
+    """Random Laman graph on n >= 2 vertices built from a single edge by Henneberg type I and II moves."""
+    rng = random.Random(seed)
+    graph_dict = _empty_graph(n)
+    _join(graph_dict, 0, 1)
+    edges = [(0, 1)]
+    for w in range(2, n):
+        if w > 2 and rng.random() < 0.5:
+            u, v = edges.pop(rng.randrange(len(edges)))
+            graph_dict[u].remove(v)
+            graph_dict[v].remove(u)
+            x = rng.choice([vertex for vertex in range(w) if vertex not in (u, v)])
+            new_neighbours = (u, v, x)
+        else:
+            new_neighbours = rng.sample(range(w), 2)
+        for vertex in new_neighbours:
+            _join(graph_dict, vertex, w)
+            edges.append((vertex, w))
+    return graph_dict
+
+
+def complete_bipartite_graph(a, b):
+    graph_dict = _empty_graph(a + b)
+    for u in range(a):
+        for v in range(a, a + b):
+            _join(graph_dict, u, v)
+    return graph_dict
+
+
+def trilateration_graph(n, d):
+    """K_{d+1} followed by vertices each joined to the d vertices before it, on n >= d + 1 vertices.
+    It is minimally rigid in dimension d, so for n >= d + 2 it has no nonzero stress."""
+    graph_dict = _empty_graph(n)
+    for w in range(1, n):
+        for vertex in range(max(0, w - d), w):
+            _join(graph_dict, vertex, w)
+    return graph_dict
+
+
+def grid_graph(rows, columns):
+    graph_dict = _empty_graph(rows * columns)
+    for r in range(rows):
+        for c in range(columns):
+            if r + 1 < rows:
+                _join(graph_dict, r * columns + c, (r + 1) * columns + c)
+            if c + 1 < columns:
+                _join(graph_dict, r * columns + c, r * columns + c + 1)
+    return graph_dict
+
+
+def triangulated_sphere(n, seed=0):
+    """Random stacked triangulation of the sphere on n >= 4 vertices: starting from a tetrahedron,
+    a new vertex is repeatedly placed in a random face and joined to its three corners."""
+    rng = random.Random(seed)
+    graph_dict = _empty_graph(n)
+    for u in range(4):
+        for v in range(u + 1, 4):
+            _join(graph_dict, u, v)
+    faces = [(0, 1, 2), (0, 1, 3), (0, 2, 3), (1, 2, 3)]
+    for w in range(4, n):
+        a, b, c = faces.pop(rng.randrange(len(faces)))
+        for vertex in (a, b, c):
+            _join(graph_dict, vertex, w)
+        faces.extend([(a, b, w), (a, c, w), (b, c, w)])
+    return graph_dict
+
+
+def random_regular_graph(n, degree, seed=0):
+    """Random simple degree-regular graph on n vertices. Stubs are shuffled and paired, the pairs that would make a
+    loop or a multiple edge are put back and paired again, and only if no allowed pair is left does it start over
+    (Steger and Wormald). Whole-graph rejection of the configuration model almost never succeeds for degree 6 or more.
+    n * degree must be even and degree less than n."""
+    if n * degree % 2 or not 0 <= degree < n:
+        raise ValueError("A degree-regular graph on n vertices needs n * degree even and degree < n.")
+    rng = random.Random(seed)
+    while True:
+        graph_dict = _empty_graph(n)
+        stubs = [vertex for vertex in range(n) for _ in range(degree)]
+        while stubs:
+            rng.shuffle(stubs)
+            left = []
+            for u, v in zip(stubs[::2], stubs[1::2]):
+                if u == v or v in graph_dict[u]:
+                    left.extend((u, v))
+                else:
+                    _join(graph_dict, u, v)
+            if left and not _can_pair(left, graph_dict):
+                break
+            stubs = left
+        else:
+            return graph_dict
+
+
+def _can_pair(stubs, graph_dict):
+    """Whether two of the stubs belong to distinct vertices that are not yet joined."""
+    vertices = set(stubs)
+    return any(v not in graph_dict[u] for u in vertices for v in vertices if u < v)
+
+
+FAMILIES = {
+    "laman": lambda n: laman_graph(n),
+    "bipartite": lambda n: complete_bipartite_graph(n // 2, n - n // 2),
+    "grid": lambda n: grid_graph(math.isqrt(n), math.isqrt(n)),
+    "sphere": lambda n: triangulated_sphere(max(n, 4)),
+    "regular": lambda n: random_regular_graph(n + n % 2, 4),
+}
+
+
+def _stages(graph_dict, dimension, first_dimension):
+    """Pairs of (stage name, function to time) for one graph. Each function gets a freshly built checker,
+    so the cached edge lists of one run do not speed up the next."""
+    setup = GlobalRigidityChecker({vertex: set(graph_dict[vertex]) for vertex in graph_dict}, dimension)
+    rigidity_matrix = setup.random_rigidity_matrix()
+    sparse_rigidity_matrix = setup.random_rigidity_matrix(sparse_output=True)
+    stress = setup.random_stress(rigidity_matrix)
+    stages = [
+        ("random_rigidity_matrix", lambda g: g.random_rigidity_matrix()),
+        ("random_rigidity_matrix_sparse", lambda g: g.random_rigidity_matrix(sparse_output=True)),
+        ("rank_check", lambda g: g.rank_check(rigidity_matrix)),
+        ("rank_check_sparse", lambda g: g.rank_check(sparse_rigidity_matrix)),
+        ("random_stress", lambda g: g.random_stress(rigidity_matrix)),
+        ("stress_matrix", lambda g: g.stress_matrix(stress)),
+        ("stress_rank_check", lambda g: g.stress_rank_check(stress)),
+    ]
+    if dimension == 2:
+        stages.append(("pebble_game", lambda g: PebbleGame(g.adjacency_list)))
+    if first_dimension:
+        stages.extend([
+            ("graph_number", lambda g: g.graph_number()),
+            ("adjacency_eigenvalues", lambda g: g.adjacency_eigenvalues()),
+            ("laplacian_eigenvalues", lambda g: g.laplacian_eigenvalues()),
+        ])
+    return stages
+
+
+def time_stage(graph_dict, dimension, function, repeats):
+    """Best wall time in seconds over the repeats, and the peak traced memory in bytes of one run."""
+    best = math.inf
+    for _ in range(repeats):
+        graph = GlobalRigidityChecker({vertex: set(graph_dict[vertex]) for vertex in graph_dict}, dimension)
+        start = time.perf_counter()
+        function(graph)
+        best = min(best, time.perf_counter() - start)
+    graph = GlobalRigidityChecker({vertex: set(graph_dict[vertex]) for vertex in graph_dict}, dimension)
+    tracemalloc.start()
+    function(graph)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(families, sizes, dimensions, repeats=3, seed=0):
+    """Dictionary from 'stage/family/n/dimension' to the timing record of that stage."""
+    results = {}
+    for family in families:
+        for n in sizes:
+            graph_dict = FAMILIES[family](n)
+            for dimension in dimensions:
+                np.random.seed(seed)
+                random.seed(seed)
+                for stage, function in _stages(graph_dict, dimension, dimension == dimensions[0]):
+                    seconds, peak = time_stage(graph_dict, dimension, function, repeats)
+                    results[f"{stage}/{family}/{n}/{dimension}"] = {
+                        "stage": stage, "family": family, "n": len(graph_dict),
+                        "m": sum(len(neighbours) for neighbours in graph_dict.values()) // 2,
+                        "dimension": dimension, "seconds": seconds, "peak_bytes": peak}
+    return results
+
+
+# (name, graph, dimension, globally rigid). K_{5,5} in 3D has stress matrix rank 2 against n - d - 1 = 6, so a path
+# that finds it globally rigid has taken rounding error for rank. K_{5,6} is globally rigid in 3D.
+KNOWN_ANSWERS = [
+    ("K5,5", complete_bipartite_graph(5, 5), 3, False),
+    ("K5,6", complete_bipartite_graph(5, 6), 3, True),
+    ("trilateration 8", trilateration_graph(8, 3), 3, False),
+]
+
+
+def _global_rigidity_paths():
+    """Pairs of (path name, function from a checker to its globally_rigid answer), and whether a positive answer
+    of the path is reliable enough to check. Single placements may miss, so only the trials are checked on those."""
+
+    def compute(sparse_output=False, prime=None):
+        def function(graph):
+            graph.compute_global_rigidity(sparse_output, prime)
+            return graph.globally_rigid
+        return function
+
+    return [
+        ("dense", compute(), False),
+        ("sparse", compute(sparse_output=True), False),
+        ("modular", compute(prime=2 ** 31 - 1), False),
+        ("trials", lambda graph: graph.global_rigidity_trials().globally_rigid, True),
+        ("small_graph_batch", lambda graph: bool(batch_global_rigidity([graph.adjacency_list],
+                                                                       graph.dimension)[2][0]), False),
+    ]
+
+
+def check_known_answers(runs=20, seed=0):
+    """Wrong answers of every global rigidity path on the KNOWN_ANSWERS, over seeded runs, as a list of
+    (path, graph, run, answer). A positive answer must never be wrong, a negative one only with small probability."""
+    wrong = []
+    for name, graph_dict, dimension, globally_rigid in KNOWN_ANSWERS:
+        for path, function, check_positive in _global_rigidity_paths():
+            if globally_rigid and not check_positive:
+                continue
+            for run in range(runs):
+                np.random.seed(seed + run)
+                random.seed(seed + run)
+                graph = GlobalRigidityChecker({vertex: set(graph_dict[vertex]) for vertex in graph_dict}, dimension)
+                answer = function(graph)
+                if answer != globally_rigid:
+                    wrong.append((path, name, run, answer))
+    return wrong
+
+
+def compare(results, baseline, threshold=1.25, minimum_seconds=1e-3):
+    """Keys of the stages that are more than threshold times slower than the baseline.
+    Stages faster than minimum_seconds in both runs are ignored as noise."""
+    slowdowns = []
+    for key, record in results.items():
+        if key not in baseline:
+            continue
+        old, new = baseline[key]["seconds"], record["seconds"]
+        if max(old, new) >= minimum_seconds and new > threshold * old:
+            slowdowns.append(key)
+    return slowdowns
+
+
+def format_table(results, baseline=None):
+    lines = [f"{'stage':<30}{'family':<11}{'n':>6}{'m':>7}{'d':>3}{'seconds':>12}{'peak MiB':>10}"
+             + (f"{'ratio':>8}" if baseline else "")]
+    for key, record in results.items():
+        line = (f"{record['stage']:<30}{record['family']:<11}{record['n']:>6}{record['m']:>7}"
+                f"{record['dimension']:>3}{record['seconds']:>12.6f}{record['peak_bytes'] / 2 ** 20:>10.2f}")
+        if baseline and key in baseline and baseline[key]["seconds"] > 0:
+            line += f"{record['seconds'] / baseline[key]['seconds']:>8.2f}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rigidity, stress and spectrum computations.")
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES), default=sorted(FAMILIES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 20, 40])
+    parser.add_argument("--dimensions", nargs="+", type=int, default=[2, 3])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against a JSON baseline and exit with status 1 on slowdowns")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that is flagged")
+    parser.add_argument("--check", action="store_true", help="check the answers on graphs with known answers")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        wrong = check_known_answers(seed=args.seed)
+        for path, name, run, answer in wrong:
+            print(f"Wrong answer: {path} found {name} {'' if answer else 'not '}globally rigid in run {run}.",
+                  flush=True)
+        if wrong:
+            sys.exit(1)
+        print("All known answers are right.", flush=True)
+        return
+    results = run_benchmarks(args.families, args.sizes, args.dimensions, args.repeats, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as stream:
+            baseline = json.load(stream)
+    print(format_table(results, baseline), flush=True)
+    if args.save:
+        with open(args.save, "w") as stream:
+            json.dump(results, stream, indent=1)
+    if baseline is not None:
+        slowdowns = compare(results, baseline, args.threshold)
+        for key in slowdowns:
+            print(f"Slowdown: {key} took {results[key]['seconds']:.6f}s against {baseline[key]['seconds']:.6f}s.",
+                  flush=True)
+        if slowdowns:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Background jobs for the graph builder, so that long checks do not freeze the window.
+
+Each job runs in its own worker process on a snapshot of the graph. What it prints is captured and sent back
+through a pipe, and the builder polls for finished jobs from its event loop.
+A job can be cancelled at any time, which terminates its process, and a new job of the same kind supersedes
+(cancels) the old one."""
+
+import io
+import multiprocessing
+import time
+import traceback
+from contextlib import redirect_stdout
+
+import lnumber as ln
+from rigidity_checker import GlobalRigidityChecker
+from realisation_cache import RealisationCache
+
+
+def rigidity_job(adjacency_list, dimension):
+    GlobalRigidityChecker(adjacency_list, dimension).rigidity_check()
+
+
+def global_rigidity_job(adjacency_list, dimension):
+    GlobalRigidityChecker(adjacency_list, dimension).global_rigidity_check()
+
+
+def laplacian_job(adjacency_list, dimension):
+    graph = GlobalRigidityChecker(adjacency_list, dimension)
+    print(f"\nThe Laplacian matrix eigenvalues are:\n{graph.laplacian_eigenvalues()}.", flush=True)
+
+
+def adjacency_job(adjacency_list, dimension):
+    graph = GlobalRigidityChecker(adjacency_list, dimension)
+    print(f"\nThe adjacency matrix eigenvalues are:\n{graph.adjacency_eigenvalues()}.", flush=True)
+
+
+def profile_job(adjacency_list, dimension):
+    """Rigidity in every dimension up to the current one, or up to n - 1 if that is larger."""
+    graph = GlobalRigidityChecker(adjacency_list, dimension)
+    profile = graph.rigidity_profile(max(dimension, graph.number_of_vertices() - 1))
+    print(f"\nRigidity profile:\n{profile.format_table()}", flush=True)
+    if profile.smallest_flexible_dimension is None:
+        print("Graph is rigid in every dimension.", flush=True)
+    else:
+        print(f"Graph is first flexible in dimension {profile.smallest_flexible_dimension}.", flush=True)
+
+
+def realisation_job(adjacency_list, dimension):
+    """Realisation numbers through the on-disk cache, which the worker opens itself."""
+    graph = GlobalRigidityChecker(adjacency_list, dimension)
+    vertex_num = graph.number_of_vertices()
+    edge_num = graph.number_of_edges()
+    cache = RealisationCache()
+    try:
+        sphere_realisations, planar_realisations = cache.realisation_counts(
+            graph.adjacency_list, lambda graph_num: (ln.lnumbers(graph_num) // 2, ln.lnumber(graph_num) // 2))
+    finally:
+        cache.close()
+    if vertex_num == 2 and edge_num == 1:
+        print(f"\nNumber of spherical realisations of graph: \n1")
+        print(f"\nNumber of planar realisations of graph: \n1", flush=True)
+    elif sphere_realisations == 0:
+        print("Graph is not minimally rigid in 2D", flush=True)
+    else:
+        print(f"\nNumber of spherical realisations of graph: \n{sphere_realisations}")
+        print(f"\nNumber of planar realisations of graph: \n{planar_realisations}", flush=True)
+
+
+def _run(connection, function, args):
+    """Worker process: runs the job and sends back everything it printed."""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            function(*args)
+        except Exception:
+            print(f"\nJob failed:\n{traceback.format_exc()}", flush=True)
+    connection.send(output.getvalue())
+    connection.close()
+
+
+class Job:
+
+    def __init__(self, name, snapshot, process, connection):
+        self.name = name
+        self.snapshot = snapshot
+        self.process = process
+        self.connection = connection
+        self.start = time.monotonic()
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+
+class JobRunner:
+    """Runs at most one job of each name at a time, each in its own process."""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def submit(self, name, function, adjacency_list, dimension):
+        """Starts function(adjacency_list, dimension) on a copy of the adjacency list in a worker process.
+        A running job of the same name is cancelled first."""
+        self.cancel(name)
+        snapshot = ({vertex: set(adjacency_list[vertex]) for vertex in adjacency_list}, dimension)
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_run, args=(sender, function, snapshot), daemon=True)
+        process.start()
+        sender.close()
+        self.jobs[name] = Job(name, snapshot, process, receiver)
+
+    def cancel(self, name=None):
+        """Cancels the named job, or every job if no name is given. Returns the names of the cancelled jobs."""
+        names = [name] if name is not None else list(self.jobs)
+        cancelled = []
+        for job_name in names:
+            job = self.jobs.pop(job_name, None)
+            if job is not None:
+                job.process.terminate()
+                job.process.join()
+                job.connection.close()
+                cancelled.append(job_name)
+        return cancelled
+
+    def poll(self):
+        """Finished jobs since the last poll, as a list of (job, printed output). Never blocks."""
+        finished = []
+        for name, job in list(self.jobs.items()):
+            # Checked before the pipe, so a job that has stopped has already sent its output.
+            alive = job.process.is_alive()
+            if job.connection.poll():
+                try:
+                    output = job.connection.recv()
+                except EOFError:
+                    output = f"\nJob {name} stopped without a result.\n"
+            elif not alive:
+                output = f"\nJob {name} stopped without a result.\n"
+            else:
+                continue
+            del self.jobs[name]
+            job.process.join()
+            job.connection.close()
+            finished.append((job, output))
+        return finished
+
+    def running(self):
+        """The running jobs."""
+        return list(self.jobs.values())
@@ -0,0 +1,121 @@
+"""Canonical labelling of graphs, so that isomorphic graphs get the same graph number.
+
+Uses individualisation-refinement: vertices are split into cells by colour refinement, and when refinement stops
+a vertex of the first smallest non-singleton cell is individualised. Every leaf of this search tree is a labelling,
+and the canonical labelling is the leaf with the largest graph number.
+Automorphisms found on the way are used to skip equivalent branches, which keeps symmetric graphs fast."""
+
+from graph_codec import pair_bit
+
+
+def labelled_graph_number(adjacency_list, labelling):
+    """Graph number of the graph after relabelling every vertex v as labelling[v]."""
+    n = len(adjacency_list)
+    graph_number = 0
+    for vertex in adjacency_list:
+        i = labelling[vertex]
+        for neighbour in adjacency_list[vertex]:
+            j = labelling[neighbour]
+            if i < j:
+                graph_number |= 1 << pair_bit(i, j, n)
+    return graph_number
+
+
+def _refine(adjacency_list, cells):
+    """Splits the ordered cells until every vertex of a cell has the same number of neighbours in every cell.
+    Cells are split in an order that does not depend on the vertex labels."""
+    changed = True
+    while changed:
+        changed = False
+        for splitter in list(cells):
+            splitter = set(splitter)
+            refined = []
+            for cell in cells:
+                if len(cell) == 1:
+                    refined.append(cell)
+                    continue
+                counts = {}
+                for vertex in cell:
+                    count = len(adjacency_list[vertex] & splitter)
+                    counts.setdefault(count, []).append(vertex)
+                if len(counts) > 1:
+                    changed = True
+                refined.extend(counts[count] for count in sorted(counts))
+            cells = refined
+            if changed:
+                break
+    return cells
+
+
+def _in_explored_orbit(vertex, explored, cell, automorphisms, prefix):
+    """Whether some automorphism fixing the prefix (or a product of them) maps an explored vertex to this one.
+    Such automorphisms map the cell to itself, so the orbits can be found within the cell."""
+    parent = {other: other for other in cell}
+
+    def find(other):
+        while parent[other] != other:
+            other = parent[other]
+        return other
+
+    for automorphism in automorphisms:
+        if all(automorphism[fixed] == fixed for fixed in prefix):
+            for other in cell:
+                parent[find(other)] = find(automorphism[other])
+    return any(find(vertex) == find(other) for other in explored)
+
+
+class _Search:
+
+    def __init__(self, adjacency_list):
+        self.adjacency_list = {vertex: set(adjacency_list[vertex]) for vertex in adjacency_list}
+        self.leaves = {}
+        self.automorphisms = []
+        self.best_number = -1
+        self.best_labelling = None
+
+    def run(self, cells, prefix):
+        """Explores the subtree below the partition. Returns the depth to jump back to when an automorphism shows
+        that the rest of an ancestor's subtree repeats work already done, otherwise None."""
+        cells = _refine(self.adjacency_list, cells)
+        if all(len(cell) == 1 for cell in cells):
+            labelling = {cell[0]: position for position, cell in enumerate(cells)}
+            graph_number = labelled_graph_number(self.adjacency_list, labelling)
+            if graph_number > self.best_number:
+                self.best_number = graph_number
+                self.best_labelling = labelling
+            if graph_number in self.leaves:
+                earlier_labelling, earlier_prefix = self.leaves[graph_number]
+                inverse = {position: vertex for vertex, position in earlier_labelling.items()}
+                self.automorphisms.append({vertex: inverse[labelling[vertex]] for vertex in labelling})
+                common = 0
+                while common < len(prefix) and prefix[common] == earlier_prefix[common]:
+                    common += 1
+                return common
+            self.leaves[graph_number] = (labelling, list(prefix))
+            return None
+        index = min((i for i, cell in enumerate(cells) if len(cell) > 1), key=lambda i: len(cells[i]))
+        cell = cells[index]
+        explored = []
+        for vertex in cell:
+            if _in_explored_orbit(vertex, explored, cell, self.automorphisms, prefix):
+                continue
+            explored.append(vertex)
+            rest = [other for other in cell if other != vertex]
+            jump = self.run(cells[:index] + [[vertex], rest] + cells[index + 1:], prefix + [vertex])
+            if jump is not None and jump < len(prefix):
+                return jump
+        return None
+
+
+def canonical_labelling(adjacency_list):
+    """Dictionary relabelling the vertices 0,...,n-1 so that isomorphic graphs become identical."""
+    if not adjacency_list:
+        return {}
+    search = _Search(adjacency_list)
+    search.run([list(adjacency_list)], [])
+    return search.best_labelling
+
+
+def canonical_graph_number(adjacency_list):
+    """Graph number of the canonical labelling, the same for all graphs isomorphic to this one."""
+    return labelled_graph_number(adjacency_list, canonical_labelling(adjacency_list))
@@ -0,0 +1,89 @@
+"""Exact global rigidity in dimension 2, without any linear algebra.
+By the theorem of Jackson and Jordan (with Connelly's sufficiency result), a graph on at least 4 vertices is
+generically globally rigid in the plane exactly when it is 3-connected and redundantly rigid.
+Graphs that are not globally rigid come with a certificate: a separating set of at most two vertices,
+or an edge whose deletion makes the graph flexible."""
+
+from pebble_game import PebbleGame
+
+
+def _articulation(adjacency_list, removed):
+    """Depth-first search of the graph with the removed vertices deleted, finding lowpoints as in Hopcroft and Tarjan.
+    Returns whether the rest of the graph is connected, and one of its cut vertices (or None if it has none)."""
+    root = next((vertex for vertex in adjacency_list if vertex not in removed), None)
+    if root is None:
+        return True, None
+    depth = {root: 0}
+    low = {root: 0}
+    root_children = 0
+    cut_vertex = None
+    stack = [(root, None, iter(adjacency_list[root]))]
+    while stack:
+        x, parent, neighbours = stack[-1]
+        for y in neighbours:
+            if y in removed or y == parent:
+                continue
+            if y in depth:
+                low[x] = min(low[x], depth[y])
+            else:
+                depth[y] = low[y] = depth[x] + 1
+                stack.append((y, x, iter(adjacency_list[y])))
+                break
+        else:
+            stack.pop()
+            if parent is None:
+                continue
+            low[parent] = min(low[parent], low[x])
+            if parent == root:
+                root_children += 1
+            elif low[x] >= depth[parent]:
+                cut_vertex = parent
+    if root_children > 1:
+        cut_vertex = root
+    return len(depth) == len(adjacency_list) - len(removed), cut_vertex
+
+
+def separating_set(adjacency_list):
+    """Set of at most two vertices whose deletion disconnects the graph, or None if the graph is 3-connected.
+    Complete graphs count as 3-connected. Runs in O(n * (n + m)) time."""
+    n = len(adjacency_list)
+    if all(len(adjacency_list[vertex]) == n - 1 for vertex in adjacency_list):
+        return None
+    connected, cut_vertex = _articulation(adjacency_list, set())
+    if not connected:
+        return set()
+    if cut_vertex is not None:
+        return {cut_vertex}
+    for vertex in adjacency_list:
+        _, cut_vertex = _articulation(adjacency_list, {vertex})
+        if cut_vertex is not None:
+            return {vertex, cut_vertex}
+    return None
+
+
+class GlobalRigidity2D:
+    """Decides generic global rigidity in dimension 2 of a graph given as an adjacency list (a dictionary of sets,
+    as in Graph). The pebble game used for rigidity and redundant rigidity is kept in game."""
+
+    def __init__(self, adjacency_list):
+        self.game = PebbleGame(adjacency_list)
+        self.separating_set = separating_set(adjacency_list)
+        self.rigid = self.game.rigid()
+        self.non_redundant_edge = None
+        if self.separating_set is None and self.rigid and len(adjacency_list) > 3:
+            non_redundant_edges = self.game.non_redundant_edges()
+            if non_redundant_edges:
+                self.non_redundant_edge = non_redundant_edges[0]
+        self.globally_rigid = self.separating_set is None and self.rigid and self.non_redundant_edge is None
+
+    def certificate(self):
+        """Reason the graph is not globally rigid, or None if it is."""
+        if self.separating_set is not None:
+            if not self.separating_set:
+                return "The graph is disconnected."
+            return f"Deleting the vertices {sorted(self.separating_set)} disconnects the graph."
+        if not self.rigid:
+            return "The graph is flexible."
+        if self.non_redundant_edge is not None:
+            return f"Deleting the edge {sorted(self.non_redundant_edge)} makes the graph flexible."
+        return None
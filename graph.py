@@ -1,11 +1,17 @@
+from collections.abc import Mapping
 import numpy as np
 from numpy import linalg as la
+from scipy import sparse
+from scipy.sparse.linalg import eigsh
+import graph_codec
 
 
 class Graph:
     """Entries should be dictionaries. Keys should be numbers 0,...,n and values should be subsets of 0,...,n.
     Graphs will be simple graphs.
-    Dictionary will be made symmetric."""
+    Dictionary will be made symmetric.
+    Derived views (vertex set, edge list, edge array, degrees) are cached until the graph is changed,
+    so the graph should only be changed through add_vertex, add_edge and delete_edge."""
 
     @staticmethod
     def make_dict_symmetric(graph_dict):
@@ -21,33 +27,59 @@ class Graph:
             graph_dict = {}
         Graph.make_dict_symmetric(graph_dict)
         self.adjacency_list = graph_dict
+        self._cache = {}
 
     def vertex_set(self):
-        """Obtains vertices as a set."""
-        vertices = set()
-        for i in self.adjacency_list:
-            vertices.add(i)
-        return vertices
+        """Obtains vertices as a set. The set is cached, so it should not be modified."""
+        if "vertex_set" not in self._cache:
+            self._cache["vertex_set"] = set(self.adjacency_list)
+        return self._cache["vertex_set"]
 
     def edge_list(self):
-        """Obtains of list edges, each represented as a set."""
-        edges = []
-        for vertex in self.adjacency_list:
-            for neighbour in self.adjacency_list[vertex]:
-                if vertex < neighbour:
-                    edges.append({vertex, neighbour})
-        return edges
+        """Obtains of list edges, each represented as a set. The list is cached, so it should not be modified."""
+        if "edge_list" not in self._cache:
+            edges = []
+            for vertex in self.adjacency_list:
+                for neighbour in self.adjacency_list[vertex]:
+                    if vertex < neighbour:
+                        edges.append({vertex, neighbour})
+            self._cache["edge_list"] = edges
+        return self._cache["edge_list"]
+
+    def edge_array(self):
+        """Obtains the edges as an (m, 2) int32 array with the smaller endpoint first.
+        Rows are in the same order as edge_list. The array is cached and read-only."""
+        if "edge_array" not in self._cache:
+            edges = np.array([(vertex, neighbour) for vertex in self.adjacency_list
+                              for neighbour in self.adjacency_list[vertex] if vertex < neighbour],
+                             dtype=np.int32).reshape(-1, 2)
+            edges.flags.writeable = False
+            self._cache["edge_array"] = edges
+        return self._cache["edge_array"]
+
+    def degrees(self):
+        """Obtains the int32 vector of vertex degrees, indexed by vertex. The vector is cached and read-only."""
+        if "degrees" not in self._cache:
+            degrees = np.bincount(self.edge_array().ravel(), minlength=self.number_of_vertices()).astype(np.int32)
+            degrees.flags.writeable = False
+            self._cache["degrees"] = degrees
+        return self._cache["degrees"]
 
     def number_of_edges(self):
         return len(self.edge_list())
 
     def number_of_vertices(self):
-        return len(self.vertex_set())
+        return len(self.adjacency_list)
+
+    def compact(self):
+        """Obtains a CompactGraph copy of the graph."""
+        return CompactGraph(self.number_of_vertices(), self.edge_array())
 
     def add_vertex(self):
         """Adds an extra vertex."""
-        if self.vertex_set():
-            max_vertex = max(self.vertex_set())
+        self._cache.clear()
+        if self.adjacency_list:
+            max_vertex = max(self.adjacency_list)
             self.adjacency_list[max_vertex + 1] = set()
         else:
             self.adjacency_list[0] = set()
@@ -55,6 +87,7 @@ class Graph:
     def add_edge(self, edge):
         """Adds an edge of the form {i,j}.
         Edge will be rejected if endpoints are not in the graph."""
+        self._cache.clear()
         for i in edge:
             for j in edge:
                 if i != j:
@@ -63,56 +96,142 @@ class Graph:
     def delete_edge(self, edge):
         """Deletes an edge of the form {i,j}.
         Edge will be rejected if endpoints are not in the graph."""
+        self._cache.clear()
         for i in edge:
             for j in edge:
                 if i != j:
                     self.adjacency_list[i].remove(j)
 
-    def adjacency_matrix(self):
-        """Obtains the graph's adjacency matrix."""
+    def adjacency_matrix(self, sparse_output=False):
+        """Obtains the graph's adjacency matrix.
+        Set sparse_output to True for a scipy.sparse CSR matrix instead of a dense array."""
         n = self.number_of_vertices()
-        adjacency_matrix = np.zeros((n, n))
-        for vertex in self.adjacency_list:
-            for neighbour in self.adjacency_list[vertex]:
-                adjacency_matrix[vertex][neighbour] = 1
-        return adjacency_matrix
-
-    def laplacian(self):
-        """Obtains the graph's Laplacian matrix."""
-        laplacian_matrix = -self.adjacency_matrix()
-        for vertex in self.adjacency_list:
-            for neighbour in self.adjacency_list[vertex]:
-                laplacian_matrix[vertex][vertex] += 1
-        return laplacian_matrix
-
-    def adjacency_eigenvalues(self):
-        adj = self.adjacency_matrix()
-        eigenvalues = list(la.eigvals(adj))
-        eigenvalues.sort()
-        return eigenvalues
-
-    def laplacian_eigenvalues(self):
-        lap = self.laplacian()
-        eigenvalues = list(la.eigvals(lap))
-        eigenvalues.sort()
-        return eigenvalues
+        edges = self.edge_array()
+        rows = np.concatenate((edges[:, 0], edges[:, 1]))
+        columns = np.concatenate((edges[:, 1], edges[:, 0]))
+        adjacency_matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(n, n))
+        if sparse_output:
+            return adjacency_matrix
+        return adjacency_matrix.toarray()
+
+    def laplacian(self, sparse_output=False):
+        """Obtains the graph's Laplacian matrix.
+        Set sparse_output to True for a scipy.sparse CSR matrix instead of a dense array."""
+        laplacian_matrix = (sparse.diags(self.degrees().astype(float)) - self.adjacency_matrix(True)).tocsr()
+        if sparse_output:
+            return laplacian_matrix
+        return laplacian_matrix.toarray()
+
+    @staticmethod
+    def symmetric_eigenvalues(matrix, k=None, largest=True, tol=1e-10):
+        """Sorted eigenvalues of a symmetric scipy.sparse matrix.
+        With k given, only the k largest (or smallest) are computed with the Lanczos method (eigsh) to relative
+        accuracy tol, which needs no factorisation and so only O(n + m) memory.
+        Otherwise, or if k is too close to n for eigsh, the full spectrum is computed densely with eigvalsh."""
+        n = matrix.shape[0]
+        if k is None or k >= n - 1:
+            eigenvalues = la.eigvalsh(matrix.toarray())
+            if k is not None:
+                eigenvalues = eigenvalues[n - k:] if largest else eigenvalues[:k]
+        else:
+            eigenvalues = eigsh(matrix, k=k, which="LA" if largest else "SA", tol=tol, return_eigenvectors=False)
+        return sorted(eigenvalues.tolist())
+
+    def adjacency_eigenvalues(self, k=None, largest=True):
+        """Obtains the adjacency matrix eigenvalues in increasing order.
+        With k given, only the k largest (or smallest if largest is False) are computed, from a sparse matrix."""
+        return Graph.symmetric_eigenvalues(self.adjacency_matrix(True), k, largest)
+
+    def laplacian_eigenvalues(self, k=None, largest=False):
+        """Obtains the Laplacian matrix eigenvalues in increasing order.
+        With k given, only the k smallest (or largest if largest is True) are computed, from a sparse matrix."""
+        return Graph.symmetric_eigenvalues(self.laplacian(True), k, largest)
+
+    def algebraic_connectivity(self):
+        """Obtains the second smallest Laplacian eigenvalue (the Fiedler value)."""
+        if self.number_of_vertices() < 2:
+            return 0.0
+        return self.laplacian_eigenvalues(k=2)[1]
 
     def graph_number(self):
         """Obtains the number representation of the graph as described in:
         'The number of realizations of all Laman graphs with at most 12 vertices',
         Jose Capco, Matteo Gallet, Georg Grasegger, Christoph Koutschan, Niels Lubbes, Josef Schicho,
-        10.5281/zenodo.1245517"""
-        graph_number = 0
-        n = self.number_of_vertices()
-        for vertex in self.adjacency_list:
-            count = n*(n-1)//2
-            if vertex > 0:
-                for i in range(vertex):
-                    count -= n-i-1
-            for neighbour in self.adjacency_list[vertex]:
-                if vertex < neighbour:
-                    graph_number += 2**(count - neighbour + vertex)
-        return graph_number
+        10.5281/zenodo.1245517
+        The inverse is graph_codec.adjacency_list_from_graph_number."""
+        return graph_codec.graph_number(self.number_of_vertices(), self.edge_array())
+
+
+class CompactGraph:
+    """Read-only graph on the vertices 0,...,n-1 stored in CSR form in int32 arrays.
+    Uses far less memory than the dictionary of sets in Graph, so it suits holding many graphs at once.
+    adjacency_list is a read-only dictionary-like view, so a CompactGraph can be used wherever an adjacency list
+    is only read."""
+
+    __slots__ = ("indptr", "indices", "edges")
+
+    def __init__(self, number_of_vertices, edges):
+        """Edges should be an (m, 2) array of vertex pairs."""
+        edges = np.sort(np.asarray(edges, dtype=np.int32).reshape(-1, 2), axis=1)
+        edges = np.unique(edges[edges[:, 0] != edges[:, 1]], axis=0)
+        heads = np.concatenate((edges[:, 0], edges[:, 1]))
+        tails = np.concatenate((edges[:, 1], edges[:, 0]))
+        order = np.lexsort((tails, heads))
+        self.indices = tails[order]
+        self.indptr = np.zeros(number_of_vertices + 1, dtype=np.int32)
+        np.cumsum(np.bincount(heads, minlength=number_of_vertices), out=self.indptr[1:])
+        self.edges = edges
+        for array in (self.indices, self.indptr, self.edges):
+            array.flags.writeable = False
+
+    @property
+    def adjacency_list(self):
+        return _AdjacencyView(self)
+
+    def neighbours(self, vertex):
+        return self.indices[self.indptr[vertex]:self.indptr[vertex + 1]]
+
+    def number_of_vertices(self):
+        return len(self.indptr) - 1
+
+    def number_of_edges(self):
+        return len(self.edges)
+
+    def vertex_set(self):
+        return set(range(self.number_of_vertices()))
+
+    def edge_list(self):
+        return [{int(u), int(v)} for u, v in self.edges]
+
+    def edge_array(self):
+        return self.edges
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def to_graph(self):
+        """Obtains a Graph copy of the graph."""
+        return Graph({vertex: set(neighbours) for vertex, neighbours in self.adjacency_list.items()})
+
+
+class _AdjacencyView(Mapping):
+    """Read-only view of a CompactGraph as a dictionary from vertices to sets of neighbours."""
+
+    __slots__ = ("graph",)
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, vertex):
+        if not 0 <= vertex < self.graph.number_of_vertices():
+            raise KeyError(vertex)
+        return frozenset(self.graph.neighbours(vertex).tolist())
+
+    def __iter__(self):
+        return iter(range(self.graph.number_of_vertices()))
+
+    def __len__(self):
+        return self.graph.number_of_vertices()
 
 
 class GraphWithOrientation(Graph):
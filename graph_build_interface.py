@@ -1,12 +1,15 @@
 import sys
 import os
 import pygame
-import lnumber as ln
 from vertices import Vertex
 from rigidity_checker import GlobalRigidityChecker
+from builder_jobs import JobRunner, rigidity_job, global_rigidity_job, laplacian_job, adjacency_job, \
+    profile_job, realisation_job
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 
+FRAME_RATE = 60
+
 
 class GraphBuilder:
 
@@ -17,14 +20,26 @@ class GraphBuilder:
         self.bg_color = (230, 230, 230)
 
         self.vertices = pygame.sprite.Group()
+        # Index from vertex name to sprite, and spatial hash from grid cell to the sprites overlapping it.
+        self.vertex_sprites = {}
+        self.vertex_grid = {}
+
+        # The screen is only redrawn when something has changed.
+        self.dirty = True
+        self.clock = pygame.time.Clock()
 
         self.graph = GlobalRigidityChecker({}, 2)
+        self.graph.track_rigidity()
 
         self.new_edge = set()
 
         self.remove_edge = set()
 
-        pygame.display.set_caption("Rigidity Checker")
+        # Expensive checks run in worker processes, so the window stays responsive.
+        self.jobs = JobRunner()
+        self.caption = None
+
+        self._update_caption()
 
     def run_game(self):
         """Start the main loop of the game."""
@@ -35,25 +50,34 @@ class GraphBuilder:
               "and press again over another vertex to connect them by an edge.", flush=True)
         print("3. Delete edges by pressing backspace when the mouse is over the first endpoint, "
               "then again when it is over the second endpoint.", flush=True)
-        print("4. Press c to cancel drawing/deleting an edge.", flush=True)
+        print("4. Press c to cancel drawing/deleting an edge, and any running checks.", flush=True)
         print("5. Press r to check rigidity in 2D, and press g to check global rigidity in 2D.", flush=True)
         print("6. Use the up and down keys to change the dimension (dimension is currently set to 2).", flush=True)
         print("7. Press l to get the approximate Laplacian eigenvalues "
               "and press a to get the approximate adjacency matrix eigenvalues.", flush=True)
         print("8. Press n to get the graph's number representation.", flush=True)
         print("9. Press t to get the graph's 2D realisation numbers (only when minimally rigid in 2D).", flush=True)
-        print("10. Press w to reset everything.", flush=True)
+        print("10. Press p to check rigidity in every dimension at once, "
+              "and to find the smallest dimension in which the graph is flexible.", flush=True)
+        print("11. Press w to reset everything.", flush=True)
+        print("The window title shows the rigidity status of the graph, updated after every edit, "
+              "and the checks still running.", flush=True)
         while True:
             self._check_events()
 
             self._update_screen()
 
+            self.clock.tick(FRAME_RATE)
+
     def _check_events(self):
-        """We are asking it to watch keyboard and mouse commands."""
+        """We are asking it to watch keyboard and mouse commands, and for finished checks."""
+        self._check_jobs()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 print(f"\nAdjacency list: {self.graph.adjacency_list}.", flush=True)
                 sys.exit()
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.dirty = True
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_pos = pygame.mouse.get_pos()
                 self._check_mouse_click(event, mouse_pos)
@@ -67,69 +91,99 @@ class GraphBuilder:
             print(f"\nAdjacency list: {self.graph.adjacency_list}.", flush=True)
             sys.exit()
         elif event.key == pygame.K_SPACE:
-            for vertex in self.vertices:
-                vertex_clicked = vertex.rect.collidepoint(mouse_pos)
-                if vertex_clicked:
-                    self.new_edge.add(vertex.name)
+            for vertex in self._vertices_at(mouse_pos):
+                self.new_edge.add(vertex.name)
             if len(self.new_edge) == 2:
                 self.graph.add_edge(self.new_edge)
                 self.new_edge = set()
+                self.dirty = True
+                self._update_caption()
                 print(f"\nAdjacency list: {self.graph.adjacency_list}.", flush=True)
             elif len(self.new_edge) > 2:
                 self.new_edge = set()
         elif event.key == pygame.K_BACKSPACE:
-            for vertex in self.vertices:
-                vertex_clicked = vertex.rect.collidepoint(mouse_pos)
-                if vertex_clicked:
-                    self.remove_edge.add(vertex.name)
+            for vertex in self._vertices_at(mouse_pos):
+                self.remove_edge.add(vertex.name)
             if len(self.remove_edge) == 2:
                 self.graph.delete_edge(self.remove_edge)
                 self.remove_edge = set()
+                self.dirty = True
+                self._update_caption()
                 print(f"\nAdjacency list: {self.graph.adjacency_list}.", flush=True)
             elif len(self.remove_edge) > 2:
                 self.remove_edge = set()
         elif event.key == pygame.K_c:
             self.new_edge = set()
             self.remove_edge = set()
+            cancelled = self.jobs.cancel()
+            if cancelled:
+                print(f"\nCancelled: {', '.join(cancelled)}.", flush=True)
+                self._update_caption()
         elif (event.key == pygame.K_r) and self.graph.adjacency_list and self.graph.edge_list():
-            self.graph.rigidity_check()
+            self._start_job("rigidity", rigidity_job)
         elif event.key == pygame.K_g and self.graph.adjacency_list and self.graph.edge_list():
-            self.graph.global_rigidity_check()
+            self._start_job("global rigidity", global_rigidity_job)
         elif event.key == pygame.K_l and self.graph.adjacency_list and self.graph.edge_list():
-            print(f"\nThe Laplacian matrix eigenvalues are:\n{self.graph.laplacian_eigenvalues()}.", flush=True)
+            self._start_job("Laplacian eigenvalues", laplacian_job)
         elif event.key == pygame.K_a and self.graph.adjacency_list and self.graph.edge_list():
-            print(f"\nThe adjacency matrix eigenvalues are:\n{self.graph.adjacency_eigenvalues()}.", flush=True)
+            self._start_job("adjacency eigenvalues", adjacency_job)
+        elif event.key == pygame.K_p and self.graph.adjacency_list and self.graph.edge_list():
+            self._start_job("rigidity profile", profile_job)
         elif (event.key == pygame.K_n) and self.graph.adjacency_list and self.graph.edge_list():
             print(f"\nThe graph's number representation is:\n{self.graph.graph_number()}.", flush=True)
         elif (event.key == pygame.K_t) and self.graph.adjacency_list and self.graph.edge_list():
-            graph_num = self.graph.graph_number()
-            vertex_num = self.graph.number_of_vertices()
-            edge_num = self.graph.number_of_edges()
-            sphere_realisations = ln.lnumbers(graph_num) // 2
-            planar_realisations = ln.lnumber(graph_num) // 2
-            if vertex_num == 2 and edge_num == 1:
-                print(f"\nNumber of spherical realisations of graph: \n1")
-                print(f"\nNumber of planar realisations of graph: \n1", flush=True)
-            elif sphere_realisations == 0:
-                print("Graph is not minimally rigid in 2D", flush=True)
-            else:
-                print(f"\nNumber of spherical realisations of graph: \n{sphere_realisations}")
-                print(f"\nNumber of planar realisations of graph: \n{planar_realisations}", flush=True)
+            self._start_job("realisation numbers", realisation_job)
         elif event.key == pygame.K_DOWN:
             if self.graph.dimension > 1:
                 self.graph.dimension_decrease()
+                self._update_caption()
                 print(f"\nDimension: {self.graph.dimension}.", flush=True)
         elif event.key == pygame.K_UP:
             self.graph.dimension_increase()
+            self._update_caption()
             print(f"\nDimension: {self.graph.dimension}.", flush=True)
         elif event.key == pygame.K_w:
             d = self.graph.dimension
             self.vertices = pygame.sprite.Group()
+            self.vertex_sprites = {}
+            self.vertex_grid = {}
+            self.dirty = True
             self.graph = GlobalRigidityChecker({}, d)
+            self.graph.track_rigidity()
             self.new_edge = set()
             self.remove_edge = set()
+            self._update_caption()
             print(f"\nGraph reset.\nDimension: {self.graph.dimension}.", flush=True)
 
+    def _start_job(self, name, job):
+        """Runs the check on a snapshot of the graph in a worker process.
+        A check of the same name that is still running is superseded."""
+        self.jobs.submit(name, job, self.graph.adjacency_list, self.graph.dimension)
+        print(f"\nComputing {name}... (press c to cancel)", flush=True)
+        self._update_caption()
+
+    def _check_jobs(self):
+        """Prints the output of finished checks and keeps the progress in the window title up to date."""
+        for job, output in self.jobs.poll():
+            print(output, end="", flush=True)
+            if job.snapshot != (self.graph.adjacency_list, self.graph.dimension):
+                print(f"(The {job.name} result is for the graph as it was when the check started.)", flush=True)
+        self._update_caption()
+
+    def _update_caption(self):
+        """Show the live rigidity status from the graph's tracker, and the running checks, in the window title."""
+        if self.graph.adjacency_list:
+            caption = f"Rigidity Checker - {self.graph.tracker.status()}"
+        else:
+            caption = "Rigidity Checker"
+        running = [f"{job.name} {job.elapsed():.0f}s" for job in self.jobs.running()]
+        if running:
+            caption += f" - computing {', '.join(running)} (c to cancel)"
+        # Only changed when the text changes, which is at most once a second while checks run.
+        if caption != self.caption:
+            pygame.display.set_caption(caption)
+            self.caption = caption
+
     def _check_mouse_click(self, event, mouse_pos):
         if event.button == 1:  # Left click
             mouse_pos_x = mouse_pos[0]
@@ -145,24 +199,39 @@ class GraphBuilder:
         vertex.rect.y = mouse_pos_y - vertex.size / 2
 
         self.vertices.add(vertex)
+        self.vertex_sprites[vertex.name] = vertex
+        for cell in self._grid_cells(vertex.rect):
+            self.vertex_grid.setdefault(cell, []).append(vertex)
+        self.dirty = True
+        self._update_caption()
+
+    def _grid_cells(self, rect):
+        """Cells of the spatial hash overlapping the rectangle. Cells are the size of a vertex."""
+        size = Vertex.size
+        return [(x, y) for x in range(rect.left // size, (rect.right - 1) // size + 1)
+                for y in range(rect.top // size, (rect.bottom - 1) // size + 1)]
+
+    def _vertices_at(self, mouse_pos):
+        """Vertex sprites under the mouse, looked up in the spatial hash."""
+        cell = (mouse_pos[0] // Vertex.size, mouse_pos[1] // Vertex.size)
+        return [vertex for vertex in self.vertex_grid.get(cell, []) if vertex.rect.collidepoint(mouse_pos)]
 
     def _update_screen(self):
-        """Update images on screen and flip to new screen."""
+        """Update images on screen and flip to new screen, if anything has changed since the last frame."""
+        if not self.dirty:
+            return
         self.screen.fill(self.bg_color)
 
         for vertex in self.vertices:
             vertex.draw_vertex()
 
-        for edge in self.graph.edge_list():
-            for vertex_1 in self.vertices:
-                for vertex_2 in self.vertices:
-                    if edge == {vertex_1.name, vertex_2.name}:
-                        pygame.draw.line(self.screen, (0, 0, 0),
-                                         (vertex_1.rect.x + vertex.size / 2, vertex_1.rect.y + vertex.size / 2),
-                                         (vertex_2.rect.x + vertex.size / 2, vertex_2.rect.y + vertex.size / 2), 10)
+        centres = {name: vertex.rect.center for name, vertex in self.vertex_sprites.items()}
+        for u, v in self.graph.edge_array().tolist():
+            pygame.draw.line(self.screen, (0, 0, 0), centres[u], centres[v], 10)
 
         # Make most recently drawn screen visible.
         pygame.display.flip()
+        self.dirty = False
 
 
 if __name__ == "__main__":
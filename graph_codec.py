@@ -0,0 +1,174 @@
+"""Conversions between graphs, graph numbers (as in Graph.graph_number), bit-packed adjacency and graph6 strings.
+Requires numpy.
+
+The graph number of a graph on n vertices has one bit for each pair i < j, and read from the most significant bit
+the pairs come in the order (0, 1), (0, 2), ..., (0, n-1), (1, 2), ..., (n-2, n-1).
+A packed graph is the same bit string stored with numpy.packbits, padded with zeros at the end to whole bytes,
+so comparing packed graphs byte by byte orders them by graph number.
+Many graphs on the same number of vertices are handled at once as a (B, number_of_bytes(n)) uint8 array,
+which suits storing and joining millions of graphs by number.
+graph6 strings list the same pairs column by column instead, six bits to a character."""
+
+import numpy as np
+
+
+def number_of_pairs(n):
+    return n * (n - 1) // 2
+
+
+def number_of_bytes(n):
+    """Bytes in a packed graph on n vertices."""
+    return (number_of_pairs(n) + 7) // 8
+
+
+def _pair_index(n, i, j):
+    """Position of the pair i < j in the bit string, counting from the most significant bit."""
+    return i * n - i * (i + 1) // 2 + j - i - 1
+
+
+def pair_bit(i, j, n):
+    """Position of the bit for the pair i < j in the graph number, counting from the least significant bit."""
+    return number_of_pairs(n) - 1 - _pair_index(n, i, j)
+
+
+def _graph6_order(n):
+    """Positions in the bit string of the pairs in graph6 order, (0, 1), (0, 2), (1, 2), (0, 3), ..."""
+    j, i = np.tril_indices(n, -1)
+    return _pair_index(n, i, j)
+
+
+def pack_edge_arrays(n, edge_arrays):
+    """Packed graphs, one row per (m, 2) edge array of a graph on the vertices 0,...,n-1."""
+    bits = np.zeros((len(edge_arrays), number_of_pairs(n)), dtype=np.uint8)
+    edges = np.concatenate([np.asarray(edge_array, dtype=np.int64).reshape(-1, 2) for edge_array in edge_arrays]
+                           + [np.zeros((0, 2), dtype=np.int64)])
+    batch = np.repeat(np.arange(len(edge_arrays)), [len(edge_array) for edge_array in edge_arrays])
+    i, j = edges.min(axis=1), edges.max(axis=1)
+    bits[batch[i != j], _pair_index(n, i, j)[i != j]] = 1
+    return np.packbits(bits, axis=1)
+
+
+def pack_adjacency_matrices(matrices):
+    """Packed graphs of a (B, n, n) stack of adjacency matrices. Only the upper triangles are read."""
+    matrices = np.asarray(matrices)
+    i, j = np.triu_indices(matrices.shape[-1], 1)
+    return np.packbits(matrices[:, i, j] != 0, axis=1)
+
+
+def unpack_bits(packed, n):
+    """(B, n(n-1)/2) array of the bits of packed graphs, one per pair. A single packed graph counts as B = 1."""
+    return np.unpackbits(np.atleast_2d(np.asarray(packed, dtype=np.uint8)), axis=1, count=number_of_pairs(n))
+
+
+def adjacency_matrices(packed, n):
+    """(B, n, n) boolean adjacency matrices of packed graphs."""
+    bits = unpack_bits(packed, n).astype(bool)
+    matrices = np.zeros((len(bits), n, n), dtype=bool)
+    i, j = np.triu_indices(n, 1)
+    matrices[:, i, j] = bits
+    matrices[:, j, i] = bits
+    return matrices
+
+
+def edge_arrays(packed, n):
+    """List of (m, 2) int32 edge arrays of packed graphs, with the smaller endpoint first."""
+    bits = unpack_bits(packed, n)
+    batch, pairs = np.nonzero(bits)
+    i, j = np.triu_indices(n, 1)
+    edges = np.stack((i[pairs], j[pairs]), axis=1).astype(np.int32)
+    return np.split(edges, np.cumsum(np.count_nonzero(bits, axis=1))[:-1])
+
+
+def graph_numbers(packed, n):
+    """Graph numbers of packed graphs, as Python integers."""
+    padding = 8 * number_of_bytes(n) - number_of_pairs(n)
+    packed = np.atleast_2d(np.asarray(packed, dtype=np.uint8))
+    return [int.from_bytes(row.tobytes(), "big") >> padding for row in packed]
+
+
+def pack_graph_numbers(numbers, n):
+    """Packed graphs of graph numbers of graphs on n vertices."""
+    padding = 8 * number_of_bytes(n) - number_of_pairs(n)
+    data = b"".join((number << padding).to_bytes(number_of_bytes(n), "big") for number in numbers)
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(numbers), number_of_bytes(n)).copy()
+
+
+def graph6_size(data):
+    """Reads the number of vertices from the front of graph6/sparse6 data (bytes shifted down by 63).
+    Returns the number of vertices and the remaining data."""
+    if data[0] < 63:
+        return data[0], data[1:]
+    if data[1] < 63:
+        return (data[1] << 12) + (data[2] << 6) + data[3], data[4:]
+    n = 0
+    for byte in data[2:8]:
+        n = (n << 6) + byte
+    return n, data[8:]
+
+
+def _graph6_header(n):
+    if n < 63:
+        values = [n]
+    elif n < 258048:
+        values = [63, n >> 12 & 63, n >> 6 & 63, n & 63]
+    else:
+        values = [63, 63] + [n >> shift & 63 for shift in range(30, -1, -6)]
+    return bytes(value + 63 for value in values)
+
+
+def graph6_strings(packed, n):
+    """graph6 strings of packed graphs."""
+    bits = unpack_bits(packed, n)[:, _graph6_order(n)]
+    bits = np.pad(bits, ((0, 0), (0, -bits.shape[1] % 6)))
+    values = bits.reshape(len(bits), -1, 6) @ (1 << np.arange(5, -1, -1)) + 63
+    header = _graph6_header(n)
+    return [(header + row.astype(np.uint8).tobytes()).decode("ascii") for row in values]
+
+
+def pack_graph6(strings):
+    """Number of vertices and packed graphs of graph6 strings, which must all have the same number of vertices."""
+    strings = [string[len(">>graph6<<"):] if string.startswith(">>graph6<<") else string for string in strings]
+    if not strings:
+        raise ValueError("No graph6 strings given.")
+    n, _ = graph6_size([ord(c) - 63 for c in strings[0][:8]])
+    header = len(_graph6_header(n))
+    length = header + (number_of_pairs(n) + 5) // 6
+    if any(len(string) != length or string[:header] != strings[0][:header] for string in strings):
+        raise ValueError("graph6 strings must all have the same number of vertices.")
+    values = np.frombuffer("".join(strings).encode("ascii"), dtype=np.uint8).reshape(len(strings), length)
+    values = values[:, header:].astype(np.int64) - 63
+    graph6_bits = (values[:, :, None] >> np.arange(5, -1, -1) & 1).reshape(len(strings), -1)
+    bits = np.zeros((len(strings), number_of_pairs(n)), dtype=np.uint8)
+    bits[:, _graph6_order(n)] = graph6_bits[:, :number_of_pairs(n)]
+    return n, np.packbits(bits, axis=1)
+
+
+def graph_number(n, edges):
+    """Graph number of the graph on the vertices 0,...,n-1 with the (m, 2) edge array."""
+    return graph_numbers(pack_edge_arrays(n, [edges]), n)[0]
+
+
+def adjacency_list_from_edges(n, edges):
+    adjacency_list = {vertex: set() for vertex in range(n)}
+    for u, v in edges.tolist():
+        adjacency_list[u].add(v)
+        adjacency_list[v].add(u)
+    return adjacency_list
+
+
+def adjacency_list_from_graph_number(graph_number, n):
+    """Adjacency list on the vertices 0,...,n-1 of the graph with this graph number."""
+    return adjacency_list_from_edges(n, edge_arrays(pack_graph_numbers([graph_number], n), n)[0])
+
+
+def adjacency_list_from_graph6(string):
+    """Adjacency list of a graph6 string."""
+    n, packed = pack_graph6([string])
+    return adjacency_list_from_edges(n, edge_arrays(packed, n)[0])
+
+
+def graph6_from_adjacency_list(adjacency_list):
+    """graph6 string of a graph on the vertices 0,...,n-1."""
+    n = len(adjacency_list)
+    edges = [(vertex, neighbour) for vertex in adjacency_list for neighbour in adjacency_list[vertex]]
+    return graph6_strings(pack_edge_arrays(n, [edges]), n)[0]
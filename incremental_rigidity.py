@@ -0,0 +1,141 @@
+"""Incremental rigidity tracking under single edge insertions and deletions. Requires numpy."""
+
+import numpy as np
+from modular_rigidity import PRIME, maximal_rank, random_modular_placement, rigidity_error_bound
+
+
+class RigidityTracker:
+    """Keeps an independent edge basis of the rigidity matrix of a fixed random placement modulo a prime.
+    The basis rows are stored in pivot form (each row is 1 in its own pivot column and every other row is 0 there),
+    together with the combination of independent edge rows that gives each basis row.
+    An insertion costs O(r * d * n) and a deletion O(r * (d * n + r)) plus one insertion test per redundant edge,
+    where r is the rank, instead of a full O(m * (d * n)^2) elimination after every edit."""
+
+    def __init__(self, adjacency_list, dimension, prime=PRIME):
+        self.dimension = dimension
+        self.prime = prime
+        self.placement = {}
+        self.basis = np.zeros((0, 0), dtype=np.int64)
+        self.pivots = []
+        self.combinations = np.zeros((0, 0), dtype=np.int64)
+        self.independent_edges = []
+        self.redundant_edges = []
+        for vertex in adjacency_list:
+            self.add_vertex(vertex)
+        for vertex in adjacency_list:
+            for neighbour in adjacency_list[vertex]:
+                if vertex < neighbour:
+                    self.add_edge({vertex, neighbour})
+
+    def add_vertex(self, vertex):
+        d = self.dimension
+        self.placement[vertex] = random_modular_placement(1, d, self.prime)[0]
+        width = d * (vertex + 1)
+        if width > self.basis.shape[1]:
+            self.basis = np.pad(self.basis, ((0, 0), (0, width - self.basis.shape[1])))
+
+    def _row(self, u, v):
+        d = self.dimension
+        row = np.zeros(self.basis.shape[1], dtype=np.int64)
+        difference = (self.placement[u] - self.placement[v]) % self.prime
+        row[d * u:d * u + d] = difference
+        row[d * v:d * v + d] = -difference % self.prime
+        return row
+
+    def _reduce(self, row):
+        """Reduces a row against the basis. Returns the remainder and its combination of independent edge rows,
+        with the row itself as an extra last coefficient."""
+        p = self.prime
+        combination = np.zeros(len(self.independent_edges) + 1, dtype=np.int64)
+        combination[-1] = 1
+        for i, coefficient in enumerate(row[self.pivots]):
+            if coefficient:
+                row = (row - coefficient * self.basis[i]) % p
+                combination[:-1] = (combination[:-1] - coefficient * self.combinations[i]) % p
+        return row, combination
+
+    def _insert(self, edge):
+        """Adds the edge to the basis if its row is independent of it. Returns True if it was added."""
+        p = self.prime
+        row, combination = self._reduce(self._row(*edge))
+        nonzero = np.flatnonzero(row)
+        if nonzero.size == 0:
+            return False
+        pivot = nonzero[0]
+        inverse = pow(int(row[pivot]), p - 2, p)
+        row = row * inverse % p
+        combination = combination * inverse % p
+        factors = self.basis[:, pivot:pivot + 1]
+        self.basis = (self.basis - factors * row) % p
+        self.combinations = np.pad(self.combinations, ((0, 0), (0, 1)))
+        self.combinations = (self.combinations - factors * combination) % p
+        self.basis = np.vstack((self.basis, row))
+        self.combinations = np.vstack((self.combinations, combination))
+        self.pivots.append(pivot)
+        self.independent_edges.append(edge)
+        return True
+
+    def _remove(self, index):
+        """Removes the independent edge at the given index and the basis row that depends on it."""
+        p = self.prime
+        column = self.combinations[:, index]
+        k = np.flatnonzero(column)[0]
+        factors = column * pow(int(column[k]), p - 2, p) % p
+        factors[k] = 0
+        self.basis = (self.basis - factors[:, None] * self.basis[k]) % p
+        self.combinations = (self.combinations - factors[:, None] * self.combinations[k]) % p
+        self.basis = np.delete(self.basis, k, axis=0)
+        self.combinations = np.delete(np.delete(self.combinations, k, axis=0), index, axis=1)
+        del self.pivots[k]
+        del self.independent_edges[index]
+
+    def add_edge(self, edge):
+        """Edge should be written as {i,j}. Returns True if it is independent of the other edges."""
+        edge = tuple(sorted(edge))
+        if self._insert(edge):
+            return True
+        self.redundant_edges.append(edge)
+        return False
+
+    def delete_edge(self, edge):
+        """Edge should be written as {i,j}.
+        Deleting an independent edge lowers the rank unless some redundant edge can take its place."""
+        edge = tuple(sorted(edge))
+        if edge in self.redundant_edges:
+            self.redundant_edges.remove(edge)
+            return
+        self._remove(self.independent_edges.index(edge))
+        for i, redundant_edge in enumerate(self.redundant_edges):
+            if self._insert(redundant_edge):
+                del self.redundant_edges[i]
+                break
+
+    def rank(self):
+        return len(self.independent_edges)
+
+    def maximal_rank(self):
+        """Rank of the rigidity matrix of a rigid graph on the same vertices."""
+        return maximal_rank(len(self.placement), self.dimension)
+
+    def independent(self):
+        return not self.redundant_edges
+
+    def rigid(self):
+        return self.rank() == self.maximal_rank()
+
+    def degrees_of_freedom(self):
+        """Number of independent non-trivial infinitesimal motions."""
+        return self.maximal_rank() - self.rank()
+
+    def error_bound(self):
+        """Probability that the placement makes independent edges look dependent or a rigid graph look flexible."""
+        return rigidity_error_bound(min(len(self.independent_edges) + len(self.redundant_edges), self.maximal_rank()), self.prime)
+
+    def status(self):
+        """Short description of the current rigidity status."""
+        if self.rigid():
+            rigidity = "minimally rigid" if self.independent() else "rigid"
+        else:
+            rigidity = "independent and flexible" if self.independent() else "flexible"
+            rigidity += f" ({self.degrees_of_freedom()} degrees of freedom)"
+        return f"{rigidity} in dimension {self.dimension}"
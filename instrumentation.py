@@ -0,0 +1,174 @@
+"""Opt-in timing and size records for the stages of the rigidity checks.
+
+Methods decorated with stage record, for every call: the wall time, the shape and number of nonzeros of the matrix
+they return (or else of the matrix they are given), the graph size, and optionally the peak memory allocated.
+Recording is off unless it is switched on, and then each decorated call only costs one check of a global.
+Switch it on for a block of code:
+    with profiling() as profile:
+        graph.compute_global_rigidity()
+    print(profile.format_table())
+or for a whole run by setting the environment variable GRAPH_RIGIDITY_PROFILE to a JSON file path, or to '-' for a
+table on standard error, which is written when the program exits."""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+from scipy import sparse
+
+_profile = None
+
+
+class Profile:
+    """Records of the stages run while it is active. With memory set, peak allocations are traced with tracemalloc,
+    which slows the stages down, so their times should then not be trusted."""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.records = []
+        self._peaks = []
+
+    def _start(self):
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1][1] = max(self._peaks[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append([current, 0])
+        return time.perf_counter()
+
+    def _stop(self, start):
+        """Seconds since start and the peak bytes allocated since then (None without memory tracing).
+        The peak is passed on to the enclosing stage, whose own peak was reset when this one started."""
+        seconds = time.perf_counter() - start
+        if not self.memory:
+            return seconds, None
+        current, peak = tracemalloc.get_traced_memory()
+        start_current, inner_peak = self._peaks.pop()
+        peak = max(peak, inner_peak)
+        tracemalloc.reset_peak()
+        if self._peaks:
+            self._peaks[-1][1] = max(self._peaks[-1][1], peak)
+        return seconds, peak - start_current
+
+    def summary(self):
+        return summarise(self.records)
+
+    def format_table(self):
+        return format_table(self.summary())
+
+    def to_json(self):
+        return json.dumps(self.records, indent=1)
+
+
+def _matrix_info(value):
+    """Shape and number of nonzeros of a dense or sparse matrix, or None if the value is not one."""
+    if sparse.issparse(value):
+        return list(value.shape), int(value.nnz)
+    if isinstance(value, np.ndarray) and value.ndim >= 2:
+        return list(value.shape), int(np.count_nonzero(value))
+    return None
+
+
+def stage(function):
+    """Decorator recording each call of the function while a profile is active."""
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _profile is None:
+            return function(*args, **kwargs)
+        profile = _profile
+        start = profile._start()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            seconds, peak = profile._stop(start)
+        record = {"stage": name, "seconds": seconds, "peak_bytes": peak, "shape": None, "nnz": None}
+        info = _matrix_info(result)
+        for arg in args:
+            if info is not None:
+                break
+            info = _matrix_info(arg)
+        if info is not None:
+            record["shape"], record["nnz"] = info
+        if args and hasattr(args[0], "number_of_vertices"):
+            record["n"] = args[0].number_of_vertices()
+            record["m"] = args[0].number_of_edges()
+            record["dimension"] = getattr(args[0], "dimension", None)
+        profile.records.append(record)
+        return result
+
+    return wrapper
+
+
+def summarise(records):
+    """Dictionary from stage name to the number of calls, total, mean and largest seconds, largest peak bytes,
+    largest matrix (by number of entries) and largest nnz. Records of several runs can be concatenated first."""
+    summary = {}
+    for record in records:
+        entry = summary.setdefault(record["stage"], {"calls": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                     "peak_bytes": None, "shape": None, "nnz": None})
+        entry["calls"] += 1
+        entry["seconds"] += record["seconds"]
+        entry["max_seconds"] = max(entry["max_seconds"], record["seconds"])
+        if record["peak_bytes"] is not None:
+            entry["peak_bytes"] = max(entry["peak_bytes"] or 0, record["peak_bytes"])
+        if record["shape"] is not None and (entry["shape"] is None
+                                            or np.prod(record["shape"]) > np.prod(entry["shape"])):
+            entry["shape"] = record["shape"]
+        if record["nnz"] is not None:
+            entry["nnz"] = max(entry["nnz"] or 0, record["nnz"])
+    for entry in summary.values():
+        entry["mean_seconds"] = entry["seconds"] / entry["calls"]
+    return summary
+
+
+def format_table(summary):
+    lines = [f"{'stage':<60}{'calls':>7}{'total s':>11}{'mean s':>11}{'max s':>11}{'peak MiB':>10}"
+             f"{'largest shape':>18}{'nnz':>10}"]
+    for name, entry in sorted(summary.items(), key=lambda item: -item[1]["seconds"]):
+        peak = "" if entry["peak_bytes"] is None else f"{entry['peak_bytes'] / 2 ** 20:.2f}"
+        shape = "" if entry["shape"] is None else "x".join(map(str, entry["shape"]))
+        nnz = "" if entry["nnz"] is None else str(entry["nnz"])
+        lines.append(f"{name:<60}{entry['calls']:>7}{entry['seconds']:>11.6f}{entry['mean_seconds']:>11.6f}"
+                     f"{entry['max_seconds']:>11.6f}{peak:>10}{shape:>18}{nnz:>10}")
+    return "\n".join(lines)
+
+
+@contextmanager
+def profiling(memory=False):
+    """Records the stages run inside the block into the Profile it yields.
+    With memory set, peak allocations are traced too."""
+    global _profile
+    previous = _profile
+    profile = Profile(memory)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _profile = profile
+    try:
+        yield profile
+    finally:
+        _profile = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _write_at_exit(profile, path):
+    if path == "-":
+        print(profile.format_table(), file=sys.stderr, flush=True)
+    else:
+        with open(path, "w") as stream:
+            stream.write(profile.to_json())
+
+
+if os.environ.get("GRAPH_RIGIDITY_PROFILE"):
+    _profile = Profile()
+    atexit.register(_write_at_exit, _profile, os.environ["GRAPH_RIGIDITY_PROFILE"])
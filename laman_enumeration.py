@@ -0,0 +1,298 @@
+"""Enumeration of all Laman graphs on n vertices up to isomorphism, with their realisation counts.
+
+Every Laman graph on n >= 3 vertices comes from one on n - 1 vertices by a Henneberg type I move (a new vertex
+joined to two vertices) or a type II move (an edge replaced by a new vertex joined to its ends and one more vertex).
+Isomorphic copies are removed by canonical augmentation: each graph has one canonical reverse move, found from its
+canonical labelling, and is only kept when it is generated from the parent that this move gives.
+So every isomorphism class is output exactly once, from one parent, with no global deduplication, and the parents
+can be split into shards that run on a process pool independently.
+
+Graph numbers (as in Graph.graph_number) of each level are written to a compact binary file, packed as by
+graph_codec, so the records compare byte by byte in the order of their graph numbers.
+After each shard the file size is checkpointed, so an interrupted run resumes from the last finished shard.
+Realisation counts of the last level need the lnumber package.
+Example:
+    python laman_enumeration.py 10 laman10.bin --workers 8"""
+
+import argparse
+import json
+import os
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+
+import numpy as np
+from canonical_form import canonical_graph_number, canonical_labelling, labelled_graph_number
+from graph_codec import adjacency_list_from_graph_number, graph_numbers, number_of_bytes, pack_graph_numbers
+from pebble_game import PebbleGame
+
+try:
+    import lnumber as ln
+except ImportError:
+    ln = None
+
+MAGIC = b"LAMANGR2"
+HEADER = struct.Struct("<HB")
+COUNTS = struct.Struct("<QQ")
+READ_BLOCK = 4096
+
+
+def record_size(n, counts):
+    return number_of_bytes(n) + (COUNTS.size if counts else 0)
+
+
+def write_header(stream, n, counts):
+    stream.write(MAGIC + HEADER.pack(n, counts))
+
+
+def read_header(stream):
+    """Number of vertices and whether realisation counts are stored, from the front of a Laman graph file."""
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a Laman graph file, or one in an older format.")
+    n, counts = HEADER.unpack(stream.read(HEADER.size))
+    return n, bool(counts)
+
+
+def encode_records(n, graph_numbers, counts=None):
+    """Bytes of the records of the graph numbers, each packed as by graph_codec and followed by its (spherical,
+    planar) counts if a list of those is given."""
+    packed = pack_graph_numbers(graph_numbers, n)
+    if counts is not None:
+        counts = np.array(counts, dtype="<u8").reshape(len(graph_numbers), 2)
+        packed = np.hstack((packed, counts.view(np.uint8)))
+    return packed.tobytes()
+
+
+def read_records(path, start=0, stop=None):
+    """Generator of (graph number, spherical count, planar count) for the records start,...,stop - 1 of a Laman graph
+    file. The counts are None if the file has none. Records are read and decoded READ_BLOCK at a time."""
+    with open(path, "rb") as stream:
+        n, counts = read_header(stream)
+        size = record_size(n, counts)
+        stream.seek(len(MAGIC) + HEADER.size + start * size)
+        index = start
+        while stop is None or index < stop:
+            block = READ_BLOCK if stop is None else min(READ_BLOCK, stop - index)
+            data = stream.read(block * size)
+            records = np.frombuffer(data[:len(data) - len(data) % size], dtype=np.uint8).reshape(-1, size)
+            if not len(records):
+                return
+            numbers = graph_numbers(records[:, :number_of_bytes(n)], n)
+            if counts:
+                pairs = records[:, number_of_bytes(n):].copy().view("<u8").tolist()
+            else:
+                pairs = [(None, None)] * len(records)
+            for graph_number, (spherical, planar) in zip(numbers, pairs):
+                yield graph_number, spherical, planar
+            index += len(records)
+            if len(records) < block:
+                return
+
+
+def number_of_records(path):
+    with open(path, "rb") as stream:
+        n, counts = read_header(stream)
+    return (os.path.getsize(path) - len(MAGIC) - HEADER.size) // record_size(n, counts)
+
+
+def henneberg_extensions(adjacency_list):
+    """Generator of the graphs made from a graph on the vertices 0,...,n-1 by one Henneberg type I or II move.
+    The new vertex is n."""
+    n = len(adjacency_list)
+    for neighbours in combinations(range(n), 2):
+        yield _extend(adjacency_list, None, neighbours)
+    for u in range(n):
+        for v in adjacency_list[u]:
+            if u < v:
+                for x in range(n):
+                    if x != u and x != v:
+                        yield _extend(adjacency_list, (u, v), (u, v, x))
+
+
+def _extend(adjacency_list, deleted_edge, neighbours):
+    n = len(adjacency_list)
+    graph_dict = {vertex: set(adjacency_list[vertex]) for vertex in adjacency_list}
+    if deleted_edge is not None:
+        u, v = deleted_edge
+        graph_dict[u].remove(v)
+        graph_dict[v].remove(u)
+    graph_dict[n] = set(neighbours)
+    for vertex in neighbours:
+        graph_dict[vertex].add(n)
+    return graph_dict
+
+
+def _candidates(graph_dict):
+    """Vertices that may be removed by the canonical reverse move: those of least degree whose sorted neighbour
+    degrees are largest. These depend only on the isomorphism class, so they are found before any labelling."""
+    degree = {vertex: len(graph_dict[vertex]) for vertex in graph_dict}
+    least = min(degree.values())
+    invariant = {vertex: sorted(degree[neighbour] for neighbour in graph_dict[vertex])
+                 for vertex in graph_dict if degree[vertex] == least}
+    best = max(invariant.values())
+    return [vertex for vertex in invariant if invariant[vertex] == best]
+
+
+def canonical_reduction(graph_dict, labelling):
+    """Graph on one vertex fewer given by the canonical reverse Henneberg move, for a canonical labelling.
+    The removed vertex is the candidate with the largest label. A vertex of degree 3 is replaced by the first edge
+    between two of its neighbours, in label order, that leaves a Laman graph."""
+    vertex = max(_candidates(graph_dict), key=labelling.get)
+    reduced = {other: graph_dict[other] - {vertex} for other in graph_dict if other != vertex}
+    if len(graph_dict[vertex]) == 2:
+        return reduced
+    neighbours = sorted(graph_dict[vertex], key=labelling.get)
+    for u, v in combinations(neighbours, 2):
+        if v not in reduced[u]:
+            reduced[u].add(v)
+            reduced[v].add(u)
+            if PebbleGame(reduced).independent():
+                return reduced
+            reduced[u].remove(v)
+            reduced[v].remove(u)
+    raise ValueError("Graph is not a Laman graph.")
+
+
+def realisation_counts(graph_number):
+    """(spherical, planar) realisation counts of a Laman graph, with the lnumber package."""
+    return ln.lnumbers(graph_number) // 2, ln.lnumber(graph_number) // 2
+
+
+def extend_shard(parent_numbers, n, counts=False):
+    """Records of the Laman graphs on n vertices whose canonical parents have the given canonical graph numbers."""
+    numbers = []
+    for parent_number in parent_numbers:
+        parent = adjacency_list_from_graph_number(parent_number, n - 1)
+        seen = set()
+        for graph_dict in henneberg_extensions(parent):
+            # A graph is only kept from the move that the canonical reverse move undoes, whose new vertex n must
+            # then be a candidate.
+            if n - 1 not in _candidates(graph_dict):
+                continue
+            labelling = canonical_labelling(graph_dict)
+            graph_number = labelled_graph_number(graph_dict, labelling)
+            if graph_number in seen:
+                continue
+            seen.add(graph_number)
+            if canonical_graph_number(canonical_reduction(graph_dict, labelling)) != parent_number:
+                continue
+            numbers.append(graph_number)
+    return encode_records(n, numbers, [realisation_counts(number) for number in numbers] if counts else None)
+
+
+def _load_checkpoint(path):
+    try:
+        with open(path) as stream:
+            return json.load(stream)
+    except FileNotFoundError:
+        return None
+
+
+def _save_checkpoint(path, checkpoint):
+    with open(path + ".tmp", "w") as stream:
+        json.dump(checkpoint, stream)
+    os.replace(path + ".tmp", path)
+
+
+def build_level(parent_path, path, n, counts=False, workers=None, shard_size=1000):
+    """Writes the Laman graphs on n vertices, extended from the file of those on n - 1 vertices, to path.
+    Parents are sent to a process pool shard_size at a time, with at most two shards per worker in flight.
+    Shards are written in order and the file size is checkpointed after each, so an interrupted run resumes from
+    the last finished shard. Nothing is done if path is already complete."""
+    checkpoint_path = path + ".checkpoint"
+    part_path = path + ".part"
+    checkpoint = _load_checkpoint(checkpoint_path)
+    if checkpoint is None:
+        if os.path.exists(path):
+            return
+        with open(part_path, "wb") as stream:
+            write_header(stream, n, counts)
+        checkpoint = {"shards": 0, "size": os.path.getsize(part_path)}
+        _save_checkpoint(checkpoint_path, checkpoint)
+    total = number_of_records(parent_path)
+    shards = range(checkpoint["shards"], (total + shard_size - 1) // shard_size)
+
+    def parents(shard):
+        start = shard * shard_size
+        return [graph_number for graph_number, _, _ in read_records(parent_path, start, start + shard_size)]
+
+    calls = ((extend_shard, parents(shard), n, counts) for shard in shards)
+    with open(part_path, "r+b") as stream:
+        # Anything written after the last checkpoint is from an unfinished shard.
+        stream.truncate(checkpoint["size"])
+        stream.seek(checkpoint["size"])
+        workers = workers or os.cpu_count()
+        if workers == 1:
+            _write_shards(stream, (function(*args) for function, *args in calls), checkpoint_path, checkpoint)
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                _write_shards(stream, _in_order(executor, calls, workers), checkpoint_path, checkpoint)
+    os.replace(part_path, path)
+    os.remove(checkpoint_path)
+
+
+def _in_order(executor, calls, workers):
+    """Generator of the results of the (function, *args) calls, in order, with at most two calls per worker
+    in flight."""
+    pending = deque()
+    while True:
+        for function, *args in islice(calls, 2 * workers - len(pending)):
+            pending.append(executor.submit(function, *args))
+        if not pending:
+            return
+        yield pending.popleft().result()
+
+
+def _write_shards(stream, results, checkpoint_path, checkpoint):
+    for records in results:
+        stream.write(records)
+        stream.flush()
+        os.fsync(stream.fileno())
+        checkpoint = {"shards": checkpoint["shards"] + 1, "size": stream.tell()}
+        _save_checkpoint(checkpoint_path, checkpoint)
+
+
+def enumerate_laman(n, output, directory=None, counts=True, workers=None, shard_size=1000):
+    """Writes all Laman graphs on n >= 2 vertices up to isomorphism to output, with their realisation counts if
+    counts is True. The smaller levels are kept in directory (by default output + '.levels'), so they are reused
+    by later runs and an interrupted run can be resumed by running it again."""
+    if counts and ln is None:
+        raise ImportError("Realisation counts need the lnumber package.")
+    directory = directory or output + ".levels"
+    os.makedirs(directory, exist_ok=True)
+    parent_path = os.path.join(directory, "laman_2.bin")
+    if not os.path.exists(parent_path):
+        with open(parent_path + ".part", "wb") as stream:
+            write_header(stream, 2, False)
+            stream.write(encode_records(2, [1]))
+        os.replace(parent_path + ".part", parent_path)
+    for k in range(3, n + 1):
+        path = output if k == n else os.path.join(directory, f"laman_{k}.bin")
+        build_level(parent_path, path, k, counts and k == n, workers, shard_size)
+        print(f"{number_of_records(path)} Laman graphs on {k} vertices.", flush=True)
+        parent_path = path
+    if n == 2:
+        with open(output, "wb") as stream:
+            write_header(stream, 2, counts)
+            stream.write(encode_records(2, [1], [realisation_counts(1)] if counts else None))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enumerate all Laman graphs on n vertices up to isomorphism.")
+    parser.add_argument("n", type=int, help="number of vertices, at least 2")
+    parser.add_argument("output", help="output file of graph numbers and realisation counts")
+    parser.add_argument("--directory", help="directory for the smaller levels (default: output + '.levels')")
+    parser.add_argument("--no-counts", action="store_true", help="do not compute realisation counts")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--shard-size", type=int, default=1000, help="parent graphs sent to a worker at a time")
+    args = parser.parse_args(argv)
+    if args.n < 2:
+        parser.error("n must be at least 2")
+    if not args.no_counts and ln is None:
+        parser.error("realisation counts need the lnumber package, use --no-counts to skip them")
+    enumerate_laman(args.n, args.output, args.directory, not args.no_counts, args.workers, args.shard_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Exact rigidity computations over a large prime field. Requires numpy.
+
+Vertices are placed at random points of F_p^d and all ranks are found by Gaussian elimination modulo p,
+so there is no floating point tolerance involved.
+The rank of an integer matrix modulo p is never larger than its generic rank, so a full rank answer is certain,
+while a rank deficient answer is wrong with probability at most the Schwartz-Zippel bound."""
+
+import numpy as np
+
+# 2**31 - 1 is prime and the product of two residues fits in an int64.
+PRIME = 2147483647
+
+
+def maximal_rank(n, d):
+    """Rank of the rigidity matrix of a rigid graph on n vertices in dimension d. n can also be an integer array."""
+    if isinstance(n, np.ndarray):
+        return np.where(n < d + 1, n * (n - 1) // 2, d * n - d * (d + 1) // 2)
+    if n < d + 1:
+        return n * (n - 1) // 2
+    return d * n - d * (d + 1) // 2
+
+
+def eliminate(matrix, prime, reduced):
+    """Row reduces a copy of the matrix modulo prime, one pivot column at a time.
+    Only rows below the pivot are cleared unless reduced is True, in which case the reduced row echelon form is
+    returned. Returns the reduced matrix and the list of pivot columns.
+    Each pivot is a separate numpy update of the rows below it, so this is exact but slower than the LAPACK SVD behind
+    the floating point ranks, by up to a few times on graphs with hundreds of vertices."""
+    a = np.array(matrix, dtype=np.int64) % prime
+    rows, columns = a.shape
+    pivots = []
+    r = 0
+    for c in range(columns):
+        if r == rows:
+            break
+        nonzero = np.flatnonzero(a[r:, c])
+        if nonzero.size == 0:
+            continue
+        k = r + nonzero[0]
+        if k != r:
+            a[[r, k], c:] = a[[k, r], c:]
+        a[r, c:] = a[r, c:] * pow(int(a[r, c]), prime - 2, prime) % prime
+        targets = np.arange(rows) if reduced else np.arange(r + 1, rows)
+        targets = targets[(targets != r) & (a[targets, c] != 0)]
+        if targets.size:
+            a[targets, c:] = (a[targets, c:] - a[targets, c:c + 1] * a[r, c:]) % prime
+        pivots.append(c)
+        r += 1
+    return a, pivots
+
+
+def modular_rank(matrix, prime=PRIME):
+    """Rank of an integer matrix modulo prime."""
+    if matrix.size == 0:
+        return 0
+    return len(eliminate(matrix, prime, False)[1])
+
+
+def modular_null_space(matrix, prime=PRIME):
+    """Basis of the kernel of an integer matrix modulo prime, as the columns of an int64 array."""
+    columns = matrix.shape[1]
+    if matrix.shape[0] == 0:
+        return np.eye(columns, dtype=np.int64)
+    reduced, pivots = eliminate(matrix, prime, True)
+    free = np.setdiff1d(np.arange(columns), pivots)
+    basis = np.zeros((columns, len(free)), dtype=np.int64)
+    basis[free, np.arange(len(free))] = 1
+    basis[pivots, :] = -reduced[:len(pivots)][:, free] % prime
+    return basis
+
+
+def random_modular_placement(number_of_vertices, dimension, prime=PRIME):
+    """Uniformly random placement in F_p^d."""
+    return np.random.randint(0, prime, size=(number_of_vertices, dimension), dtype=np.int64)
+
+
+def random_modular_stress(rigidity_matrix, prime=PRIME):
+    """Uniformly random element of the left kernel of the rigidity matrix modulo prime."""
+    basis = modular_null_space(np.transpose(rigidity_matrix), prime)
+    stress = np.zeros(basis.shape[0], dtype=np.int64)
+    coefficients = np.random.randint(0, prime, size=basis.shape[1], dtype=np.int64)
+    # Accumulate one basis vector at a time so the products never overflow.
+    for j in range(basis.shape[1]):
+        stress = (stress + basis[:, j] * coefficients[j]) % prime
+    return stress
+
+
+def modular_stress_matrix(edges, number_of_vertices, stress, prime=PRIME):
+    """Stress matrix modulo prime of the stress on the (m, 2) edge array."""
+    stress = np.asarray(stress, dtype=np.int64).ravel() % prime
+    u, v = edges[:, 0], edges[:, 1]
+    stress_matrix = np.zeros((number_of_vertices, number_of_vertices), dtype=np.int64)
+    np.add.at(stress_matrix, (u, u), stress)
+    np.add.at(stress_matrix, (v, v), stress)
+    np.add.at(stress_matrix, (u, v), prime - stress)
+    np.add.at(stress_matrix, (v, u), prime - stress)
+    return stress_matrix % prime
+
+
+def rigidity_error_bound(target_rank, prime=PRIME):
+    """Probability that a random placement modulo prime gives a rank below the generic rank.
+    target_rank is the rank a yes answer needs, min(m, maximal rank), which bounds the generic rank: a minor of
+    that order of the rigidity matrix is a polynomial of degree target_rank in the coordinates. The observed rank
+    must not be used, since it is smaller exactly when the placement was unlucky."""
+    return min(1.0, target_rank / prime)
+
+
+def global_rigidity_error_bound(target_rank, number_of_vertices, dimension, prime=PRIME):
+    """Probability that a random placement and random stress modulo prime miss the generic stress matrix rank.
+    target_rank is as for rigidity_error_bound. The kernel basis has entries of degree at most target_rank in the
+    coordinates (Cramer's rule), so a minor of order n - d - 1 of the stress matrix has degree at most
+    (n - d - 1)(target_rank + 1). The rigidity rank itself must also be generic."""
+    order = max(number_of_vertices - dimension - 1, 0)
+    return min(1.0, (target_rank + order * (target_rank + 1)) / prime)
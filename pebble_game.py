@@ -0,0 +1,134 @@
+"""The (2,3)-pebble game of Jacobs and Hendrickson.
+Decides generic rigidity in dimension 2 exactly, by Laman's theorem, without any linear algebra."""
+
+
+class PebbleGame:
+    """Plays the (2,3)-pebble game on a graph given as an adjacency list (a dictionary of sets, as in Graph).
+    Every vertex starts with two pebbles and an edge is accepted when four pebbles can be gathered on its endpoints.
+    The accepted edges form a maximal independent set in the 2-dimensional rigidity matroid.
+    Runs in O(n * m) time."""
+
+    def __init__(self, adjacency_list):
+        self.adjacency_list = adjacency_list
+        self.pebbles = {vertex: 2 for vertex in adjacency_list}
+        self.out_edges = {vertex: set() for vertex in adjacency_list}
+        self.independent_edges = []
+        self.redundant_edges = []
+        for vertex in adjacency_list:
+            for neighbour in adjacency_list[vertex]:
+                if vertex < neighbour:
+                    self.add_edge({vertex, neighbour})
+
+    def _find_pebble(self, root, pinned):
+        """Moves a free pebble onto root by reversing a directed path, without using the pebbles on pinned.
+        Returns False if no free pebble can be reached."""
+        parent = {root: None}
+        visited = {root, pinned}
+        stack = [root]
+        while stack:
+            x = stack.pop()
+            for y in self.out_edges[x]:
+                if y in visited:
+                    continue
+                parent[y] = x
+                if self.pebbles[y] > 0:
+                    self.pebbles[y] -= 1
+                    self.pebbles[root] += 1
+                    while parent[y] is not None:
+                        x = parent[y]
+                        self.out_edges[x].remove(y)
+                        self.out_edges[y].add(x)
+                        y = x
+                    return True
+                visited.add(y)
+                stack.append(y)
+        return False
+
+    def _gather(self, u, v, total):
+        """Tries to gather total pebbles on u and v, at most two on each."""
+        while self.pebbles[u] < min(2, total):
+            if not self._find_pebble(u, v):
+                break
+        while self.pebbles[v] < total - self.pebbles[u]:
+            if not self._find_pebble(v, u):
+                break
+        return self.pebbles[u] + self.pebbles[v] >= total
+
+    def add_edge(self, edge):
+        """Plays the edge {u,v}. Returns True if it is independent of the edges played so far."""
+        u, v = sorted(edge)
+        if self._gather(u, v, 4):
+            self.pebbles[u] -= 1
+            self.out_edges[u].add(v)
+            self.independent_edges.append({u, v})
+            return True
+        self.redundant_edges.append({u, v})
+        return False
+
+    def rank(self):
+        """Generic rank of the 2-dimensional rigidity matrix."""
+        return len(self.independent_edges)
+
+    def independent(self):
+        return not self.redundant_edges
+
+    def rigid(self):
+        n = len(self.adjacency_list)
+        return n < 2 or self.rank() == 2 * n - 3
+
+    def _component(self, u, v):
+        """Vertex set of the maximal rigid component containing the independent edge {u,v}.
+        With three pebbles held on u and v, these are u, v and every vertex that cannot reach another free pebble."""
+        self._gather(u, v, 3)
+        in_edges = {vertex: [] for vertex in self.out_edges}
+        for x in self.out_edges:
+            for y in self.out_edges[x]:
+                in_edges[y].append(x)
+        reaches_pebble = {w for w in self.pebbles if self.pebbles[w] > 0 and w not in (u, v)}
+        stack = list(reaches_pebble)
+        while stack:
+            y = stack.pop()
+            for x in in_edges[y]:
+                if x not in reaches_pebble and x not in (u, v):
+                    reaches_pebble.add(x)
+                    stack.append(x)
+        return set(self.out_edges) - reaches_pebble
+
+    def rigid_components(self):
+        """Maximal rigid components as a list of vertex sets, each spanned by at least one edge.
+        Distinct components share at most one vertex."""
+        components = []
+        for edge in self.independent_edges:
+            if any(edge <= component for component in components):
+                continue
+            components.append(self._component(*sorted(edge)))
+        return components
+
+    def _reach(self, u, v):
+        """Vertices reachable from u or v along the directed edges."""
+        reached = {u, v}
+        stack = [u, v]
+        while stack:
+            x = stack.pop()
+            for y in self.out_edges[x]:
+                if y not in reached:
+                    reached.add(y)
+                    stack.append(y)
+        return reached
+
+    def non_redundant_edges(self):
+        """Independent edges that lie in no circuit, so that deleting any one of them lowers the rank.
+        For a redundant edge {u,v}, the vertices reached from u and v once they hold three pebbles form the smallest
+        tight set containing u and v, and its independent edges together with {u,v} form the circuit of {u,v}."""
+        in_circuit = set()
+        for edge in self.redundant_edges:
+            u, v = sorted(edge)
+            self._gather(u, v, 3)
+            for x in self._reach(u, v):
+                for y in self.out_edges[x]:
+                    in_circuit.add(frozenset((x, y)))
+        return [edge for edge in self.independent_edges if frozenset(edge) not in in_circuit]
+
+    def redundantly_rigid(self):
+        """Whether the graph stays rigid after deleting any one edge."""
+        return self.rigid() and not self.non_redundant_edges()
@@ -0,0 +1,70 @@
+"""Persistent cache of spherical and planar realisation counts, keyed by canonical graph number.
+
+Isomorphic graphs share one entry, so counts paid for once are reused across sessions and batch runs.
+The cache is an SQLite file and the least recently used entries are evicted once it holds more than max_entries."""
+
+import os
+import sqlite3
+import time
+
+from canonical_form import canonical_graph_number
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "graph-rigidity-checker", "realisations.sqlite")
+
+
+class RealisationCache:
+
+    def __init__(self, path=None, max_entries=1000000):
+        """The path defaults to the GRAPH_RIGIDITY_CACHE environment variable, or else DEFAULT_PATH."""
+        if path is None:
+            path = os.environ.get("GRAPH_RIGIDITY_CACHE", DEFAULT_PATH)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        # Graph numbers outgrow SQLite integers from 12 vertices on, so they are stored as text.
+        self.connection.execute("CREATE TABLE IF NOT EXISTS realisations ("
+                                "vertices INTEGER NOT NULL, graph_number TEXT NOT NULL, "
+                                "spherical INTEGER NOT NULL, planar INTEGER NOT NULL, last_used REAL NOT NULL, "
+                                "PRIMARY KEY (vertices, graph_number))")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS last_used_index ON realisations (last_used)")
+        self.connection.commit()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM realisations").fetchone()[0]
+
+    def get(self, vertices, graph_number):
+        """Realisation counts (spherical, planar) of a canonical graph number, or None if they are not cached."""
+        key = (vertices, str(graph_number))
+        row = self.connection.execute("SELECT spherical, planar FROM realisations "
+                                      "WHERE vertices = ? AND graph_number = ?", key).fetchone()
+        if row is not None:
+            self.connection.execute("UPDATE realisations SET last_used = ? WHERE vertices = ? AND graph_number = ?",
+                                    (time.time(),) + key)
+            self.connection.commit()
+        return row
+
+    def put(self, vertices, graph_number, spherical, planar):
+        """Stores the realisation counts of a canonical graph number, evicting the least recently used entries
+        if the cache is full."""
+        self.connection.execute("INSERT OR REPLACE INTO realisations VALUES (?, ?, ?, ?, ?)",
+                                (vertices, str(graph_number), spherical, planar, time.time()))
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self.connection.execute("DELETE FROM realisations WHERE rowid IN "
+                                    "(SELECT rowid FROM realisations ORDER BY last_used LIMIT ?)", (excess,))
+        self.connection.commit()
+
+    def realisation_counts(self, adjacency_list, compute):
+        """Realisation counts (spherical, planar) of the graph.
+        On a cache miss they are found by calling compute on the canonical graph number and then stored."""
+        vertices = len(adjacency_list)
+        graph_number = canonical_graph_number(adjacency_list)
+        counts = self.get(vertices, graph_number)
+        if counts is None:
+            counts = tuple(compute(graph_number))
+            self.put(vertices, graph_number, *counts)
+        return tuple(counts)
+
+    def close(self):
+        self.connection.close()
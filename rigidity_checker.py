@@ -4,7 +4,160 @@ from graph import Graph
 import numpy as np
 from numpy.linalg import matrix_rank
 import random
+from scipy import sparse
 from scipy.linalg import null_space
+from scipy.sparse.csgraph import maximum_bipartite_matching, reverse_cuthill_mckee
+from scipy.sparse.linalg import eigsh, splu
+from pebble_game import PebbleGame
+from global_rigidity_2d import GlobalRigidity2D
+from incremental_rigidity import RigidityTracker
+from instrumentation import stage
+from rigidity_profile import sweep_dimensions
+from modular_rigidity import maximal_rank, modular_rank, random_modular_placement, random_modular_stress, \
+    modular_stress_matrix, rigidity_error_bound, global_rigidity_error_bound
+
+
+@stage
+def generic_rank(matrix, prime=None):
+    """Numerical rank of a dense array or a scipy.sparse matrix.
+    If a prime is given, the matrix must be a dense integer array and its exact rank modulo the prime is returned."""
+    if prime is not None:
+        return modular_rank(matrix, prime)
+    if not sparse.issparse(matrix):
+        return matrix_rank(matrix)
+    return sparse_rank(matrix)
+
+
+def sparse_rank(matrix, gap=1e3, attempts=3):
+    """Numerical rank of a scipy.sparse matrix from a sparse LU factorisation of the matrix itself.
+    The matrix, transposed if it is wide, is bordered to a square that is structurally nonsingular: rows missed by
+    a maximum matching get a large identity column, columns missed by it get a border row far below the tolerance.
+    Partial pivoting then only falls back on a border row when the column depends on the ones before it, so the
+    rank is the number of pivots of the original columns above the tolerance numpy's matrix_rank would use.
+    Rows and columns are randomly rescaled so that integer entries do not cancel exactly. An attempt is repeated with
+    a new scaling if the factorisation fails or a pivot lies less than gap times above the tolerance; if every
+    attempt does, the rank is taken from a dense SVD."""
+    matrix = sparse.csr_matrix(matrix)
+    if matrix.shape[0] < matrix.shape[1]:
+        matrix = matrix.T.tocsr()
+    rows, columns = matrix.shape
+    if matrix.nnz == 0:
+        return 0
+    free_rows = np.flatnonzero(maximum_bipartite_matching(matrix, perm_type="column") < 0)
+    order = reverse_cuthill_mckee(sparse.csr_matrix(abs(matrix.T) @ abs(matrix)), symmetric_mode=True)
+    matrix = matrix.tocsc()[:, order]
+    free_columns = np.flatnonzero(maximum_bipartite_matching(matrix.T.tocsr(), perm_type="column") < 0)
+    largest = abs(matrix).max()
+    epsilon = max(rows, columns) * np.finfo(float).eps
+    for _ in range(attempts):
+        scaled = sparse.diags(np.random.uniform(1, 2, rows)) @ matrix @ sparse.diags(np.random.uniform(1, 2, columns))
+        identity = sparse.csc_matrix((np.random.uniform(1, 2, len(free_rows)) * largest,
+                                      (free_rows, np.arange(len(free_rows)))), shape=(rows, len(free_rows)))
+        border = sparse.csc_matrix((np.random.uniform(1, 2, len(free_columns)) * largest * epsilon / gap,
+                                    (np.arange(len(free_columns)), free_columns)), shape=(len(free_columns), columns))
+        try:
+            factors = splu(sparse.bmat([[scaled, identity], [border, None]], format="csc"),
+                           permc_spec="NATURAL", diag_pivot_thresh=1.0)
+        except RuntimeError:
+            continue
+        pivots = np.abs(factors.U.diagonal()[:columns])
+        line = pivots.max() * epsilon
+        if not np.any((pivots > line) & (pivots <= gap * line)):
+            return int(np.count_nonzero(pivots > line))
+    return int(matrix_rank(matrix.toarray()))
+
+
+def pinned_columns(n, d):
+    """Boolean mask of the columns of a rigidity matrix left after pinning coordinates i,...,d-1 of vertex i for
+    i < d. At a generic placement this removes exactly the trivial motions, so the remaining columns of the rigidity
+    matrix of a rigid graph are independent and span the same space as all of them."""
+    keep = np.ones(d * n, dtype=bool)
+    for i in range(min(d, n)):
+        keep[d * i + i:d * i + d] = False
+    return keep
+
+
+# Relative tolerance and gap of symmetric_rank, also used for the batched stress matrix ranks.
+STRESS_TOLERANCE = 1e-10
+STRESS_GAP = 1e3
+
+
+@stage
+def symmetric_rank(matrix, nullity_bound, tolerance=STRESS_TOLERANCE, gap=STRESS_GAP):
+    """Numerical rank of a symmetric dense array or scipy.sparse matrix, found from eigenvalues rather than an SVD.
+    Eigenvalues below tolerance times the largest one count as zero. Stresses carry rounding error, so this is much
+    looser than machine precision. If an eigenvalue lies above that line but less than gap times above it, the rank
+    cannot be told apart from noise and None is returned.
+    For sparse matrices only the nullity_bound eigenvalues closest to zero are computed (shift-invert Lanczos),
+    so if all of them vanish the returned value is only an upper bound: the rank is at most n - nullity_bound."""
+    n = matrix.shape[0]
+    if n == 0:
+        return 0
+    if not sparse.issparse(matrix) or nullity_bound >= n - 1:
+        if sparse.issparse(matrix):
+            matrix = matrix.toarray()
+        eigenvalues = np.abs(np.linalg.eigvalsh(matrix))
+        largest = eigenvalues.max()
+    else:
+        matrix = matrix.tocsc()
+        if matrix.nnz == 0 or abs(matrix).max() == 0:
+            return 0
+        largest = np.abs(eigsh(matrix, k=1, which="LM", return_eigenvectors=False)).max()
+        if largest == 0:
+            return 0
+        eigenvalues = np.abs(eigsh(matrix, k=nullity_bound, sigma=-1e-6 * largest, return_eigenvectors=False))
+    if largest == 0:
+        return 0
+    line = tolerance * largest
+    if np.any((eigenvalues > line) & (eigenvalues <= gap * line)):
+        return None
+    return n - np.count_nonzero(eigenvalues <= line)
+
+
+def batch_stress_ranks(matrices, incidence):
+    """Rigidity matrix ranks, random stress matrix ranks and whether each stress matrix rank is clear, for a
+    (k, m, dn) stack of rigidity matrices and their (m, n) or (k, m, n) incidence matrices. A single batched SVD
+    gives both the ranks and the left kernels from which the stresses are drawn. Stress matrix ranks use the relative
+    tolerance and gap of symmetric_rank. Zero rows padding the matrices do not change any rank."""
+    k, m, columns = matrices.shape
+    left, singular_values, _ = np.linalg.svd(matrices, full_matrices=True)
+    if singular_values.size:
+        tol = singular_values.max(axis=-1, keepdims=True) * max(m, columns) * np.finfo(float).eps
+        ranks = np.count_nonzero(singular_values > tol, axis=-1)
+    else:
+        ranks = np.zeros(k, dtype=int)
+    coefficients = np.random.randint(0, 100 * m + 1, size=(k, m)).astype(float)
+    coefficients[np.arange(m) < ranks[:, None]] = 0
+    stresses = (left @ coefficients[..., None])[..., 0]
+    # Stress on zero rows of the incidence matrix, such as padding edges, drops out of the stress matrix.
+    stress_matrices = (np.swapaxes(incidence, -1, -2) * stresses[:, None, :]) @ incidence
+    eigenvalues = np.abs(np.linalg.eigvalsh(stress_matrices))
+    line = STRESS_TOLERANCE * eigenvalues.max(axis=-1, initial=0.0, keepdims=True)
+    clear = ~np.any((eigenvalues > line) & (eigenvalues <= STRESS_GAP * line), axis=-1)
+    return ranks, np.count_nonzero(eigenvalues > line, axis=-1), clear
+
+
+class TrialResult:
+    """Outcome of several random realisations tried by rigidity_trials or global_rigidity_trials.
+    failure_bound bounds the probability that every trial missed the generic rank (Schwartz-Zippel),
+    so a negative answer is wrong with at most that probability.
+    best_stress_rank is None if the stress test failed in every trial."""
+
+    def __init__(self, trials, best_rank, maximal_rank, independent, rigid, failure_bound,
+                 best_stress_rank=None, globally_rigid=None):
+        self.trials = trials
+        self.best_rank = best_rank
+        self.maximal_rank = maximal_rank
+        self.independent = independent
+        self.rigid = rigid
+        self.failure_bound = failure_bound
+        self.best_stress_rank = best_stress_rank
+        self.globally_rigid = globally_rigid
+
+    def __repr__(self):
+        return (f"TrialResult(trials={self.trials}, best_rank={self.best_rank}, maximal_rank={self.maximal_rank}, "
+                f"independent={self.independent}, rigid={self.rigid}, failure_bound={self.failure_bound:.3g}, "
+                f"best_stress_rank={self.best_stress_rank}, globally_rigid={self.globally_rigid})")
 
 
 class RigidityChecker(Graph):
@@ -15,49 +168,201 @@ class RigidityChecker(Graph):
         self.dimension = dimension
         self.independent = False
         self.rigid = False
+        self.rank = None
+        self.error_bound = None
+        self.tracker = None
+
+    def track_rigidity(self):
+        """Attaches a RigidityTracker that is kept up to date by add_vertex, add_edge, delete_edge
+        and changes of dimension."""
+        self.tracker = RigidityTracker(self.adjacency_list, self.dimension)
+        return self.tracker
+
+    def add_vertex(self):
+        super().add_vertex()
+        if self.tracker is not None:
+            self.tracker.add_vertex(max(self.vertex_set()))
+
+    def add_edge(self, edge):
+        i, j = edge
+        new_edge = j not in self.adjacency_list[i]
+        super().add_edge(edge)
+        if self.tracker is not None and new_edge:
+            self.tracker.add_edge(edge)
+
+    def delete_edge(self, edge):
+        super().delete_edge(edge)
+        if self.tracker is not None:
+            self.tracker.delete_edge(edge)
 
     def dimension_increase(self):
         self.dimension += 1
+        if self.tracker is not None:
+            self.track_rigidity()
 
     def dimension_decrease(self):
         self.dimension -= 1
+        if self.tracker is not None:
+            self.track_rigidity()
+
+    @stage
+    def random_placement(self, prime=None):
+        """Integer placement, uniform in F_p^d if a prime is given."""
+        n = self.number_of_vertices()
+        if prime is not None:
+            return random_modular_placement(n, self.dimension, prime)
+        return np.random.randint(0, 100 * n + 1, size=(n, self.dimension)).astype(float)
+
+    @stage
+    def random_placements(self, trials):
+        """Stacked (trials, n, d) array of independent integer placements."""
+        n = self.number_of_vertices()
+        return np.random.randint(0, 100 * n + 1, size=(trials, n, self.dimension)).astype(float)
 
-    def random_placement(self):
-        placement = np.zeros((self.number_of_vertices(), self.dimension))
-
-        for v in self.vertex_set():
-            for k in range(self.dimension):
-                placement[v][k] = random.randint(0, 100 * self.number_of_vertices())
-        return placement
-
-    def random_rigidity_matrix(self):
-        rigidity_matrix = np.zeros((self.number_of_edges(), self.dimension * self.number_of_vertices()))
-        placement = self.random_placement()
-        for e in self.edge_list():
-            for v in self.vertex_set():
-                if v == min(e):
-                    for k in range(self.dimension):
-                        rigidity_matrix[self.edge_list().index(e)][self.dimension * v + k] = \
-                            placement[v][k] - placement[max(e)][k]
-                elif v == max(e):
-                    for k in range(self.dimension):
-                        rigidity_matrix[self.edge_list().index(e)][self.dimension * v + k] = \
-                            -rigidity_matrix[self.edge_list().index(e)][self.dimension * min(e) + k]
+    def maximal_rank(self):
+        """Rank of the rigidity matrix of a rigid graph on the same vertices."""
+        return maximal_rank(self.number_of_vertices(), self.dimension)
+
+    def target_rank(self):
+        """Rank the rigidity matrix reaches at a generic placement if the graph is independent or rigid."""
+        return min(self.number_of_edges(), self.maximal_rank())
+
+    @stage
+    def incidence_matrix(self, sparse_output=False):
+        """Signed (m, n) incidence matrix with rows in the order of edge_list.
+        The smaller endpoint of each edge gets 1 and the larger gets -1."""
+        edges = self.edge_array()
+        m = len(edges)
+        values = np.tile([1.0, -1.0], m)
+        rows = np.repeat(np.arange(m), 2)
+        incidence = sparse.csr_matrix((values, (rows, edges.ravel())), shape=(m, self.number_of_vertices()))
+        if sparse_output:
+            return incidence
+        return incidence.toarray()
+
+    @stage
+    def rigidity_matrix(self, placement, sparse_output=False):
+        """Builds the rigidity matrix of the given placement in one vectorised pass.
+        Row i belongs to the i-th edge of edge_list and has 2 * dimension nonzeros.
+        Set sparse_output to True for a scipy.sparse CSR matrix instead of a dense array.
+        A stacked (k, n, d) placement gives a dense (k, m, dn) array of k rigidity matrices."""
+        d = self.dimension
+        n = self.number_of_vertices()
+        edges = self.edge_array()
+        m = len(edges)
+        u, v = edges[:, 0], edges[:, 1]
+        difference = placement[..., u, :] - placement[..., v, :]
+        values = np.concatenate((difference, -difference), axis=-1)
+        columns = np.concatenate((d * u[:, None] + np.arange(d), d * v[:, None] + np.arange(d)), axis=1)
+        if sparse_output:
+            row_pointers = np.arange(0, 2 * d * m + 1, 2 * d)
+            return sparse.csr_matrix((values.ravel(), columns.ravel(), row_pointers), shape=(m, d * n))
+        rigidity_matrix = np.zeros(placement.shape[:-2] + (m, d * n), dtype=placement.dtype)
+        rigidity_matrix[..., np.arange(m)[:, None], columns] = values
         return rigidity_matrix
 
-    def rank_check(self, matrix):
-        if matrix_rank(matrix) == self.number_of_edges():
+    @stage
+    def random_rigidity_matrix(self, sparse_output=False, prime=None):
+        """If a prime is given, the matrix is a dense int64 array reduced modulo the prime."""
+        if prime is not None:
+            return self.rigidity_matrix(self.random_placement(prime)) % prime
+        return self.rigidity_matrix(self.random_placement(), sparse_output)
+
+    @stage
+    def rank_check(self, matrix, prime=None):
+        """Matrix can be a dense array or a scipy.sparse matrix.
+        If a prime is given, the rank is computed exactly modulo the prime and error_bound is set."""
+        rank = generic_rank(matrix, prime)
+        self.rank = rank
+        if prime is not None:
+            self.error_bound = rigidity_error_bound(self.target_rank(), prime)
+        if rank == self.number_of_edges():
             self.independent = True
         else:
             self.independent = False
-        if matrix_rank(matrix) == self.dimension * self.number_of_vertices() - \
-                (self.dimension * (self.dimension + 1) / 2):
+        if rank == self.maximal_rank():
             self.rigid = True
         else:
             self.rigid = False
 
-    def rigidity_check(self):
-        self.rank_check(self.random_rigidity_matrix())
+    def trial_failure_bound(self, degree, trials):
+        """Probability that trials independent placements all miss the generic rank, if the failures are roots of a
+        polynomial of the given degree in the coordinates, which are uniform in 0,...,100n."""
+        return min(1.0, degree / (100 * self.number_of_vertices() + 1)) ** trials
+
+    def _batched_ranks(self, trials, batch_size, batch_ranks, target):
+        """Runs batches of placements through batch_ranks, which returns a tuple of arrays for a batch of
+        rigidity matrices, the first being a score for each trial, and stops after the first batch in which some
+        trial scores target. Returns the number of trials run and the values of the best scoring trial."""
+        run = 0
+        best = None
+        while run < trials:
+            size = min(batch_size, trials - run)
+            ranks = batch_ranks(self.rigidity_matrix(self.random_placements(size)))
+            run += size
+            i = int(np.argmax(ranks[0]))
+            if best is None or ranks[0][i] > best[0]:
+                best = tuple(int(rank[i]) for rank in ranks)
+            if best[0] == target:
+                break
+        return run, best
+
+    @stage
+    def rigidity_trials(self, trials=10, batch_size=4):
+        """Tries up to trials random placements, batch_size at a time as one stacked array of rigidity matrices,
+        and stops after the first batch in which some placement reaches the largest possible rank.
+        Sets independent, rigid and rank from the best placement and returns a TrialResult."""
+        target = min(self.number_of_edges(), self.maximal_rank())
+        if self.number_of_edges() == 0:
+            run, (rank,) = 0, (0,)
+        else:
+            run, (rank,) = self._batched_ranks(trials, batch_size, lambda matrices: (matrix_rank(matrices),), target)
+        self.rank = rank
+        self.independent = rank == self.number_of_edges()
+        self.rigid = rank == self.maximal_rank()
+        failure_bound = 0.0 if rank == target else self.trial_failure_bound(target, run)
+        self.error_bound = failure_bound
+        return TrialResult(run, rank, self.maximal_rank(), self.independent, self.rigid, failure_bound)
+
+    @stage
+    def rigidity_profile(self, max_dimension=None, prime=None):
+        """Rank, independence, rigidity and stress space dimension in every dimension from 1 to max_dimension
+        (by default n - 1), from one sweep that reuses the work of each dimension in the next.
+        Returns a RigidityProfile, which also gives the smallest dimension in which the graph is flexible.
+        The dimension and the flags of the checker are not changed."""
+        return sweep_dimensions(self, max_dimension, prime)
+
+    @stage
+    def pebble_check(self):
+        """Exact rigidity check in dimension 2 using the (2,3)-pebble game.
+        Returns the finished PebbleGame, which holds the redundant edges and the rigid components."""
+        game = PebbleGame(self.adjacency_list)
+        self.rank = game.rank()
+        self.independent = game.independent()
+        self.rigid = game.rigid()
+        self.error_bound = 0.0
+        return game
+
+    @stage
+    def compute_rigidity(self, sparse_output=False, prime=None):
+        """Sets independent and rigid without printing anything.
+        Dimension 2 is decided exactly by the pebble game.
+        Otherwise set prime to use the exact modular backend instead of floating point ranks."""
+        if self.dimension == 2:
+            self.pebble_check()
+        else:
+            self.rank_check(self.random_rigidity_matrix(sparse_output, prime), prime)
+        n = self.number_of_vertices()
+        m = self.number_of_edges()
+        if n < self.dimension + 1:
+            self.independent = True
+            self.rigid = 2 * m == n * (n - 1)
+
+    def rigidity_check(self, sparse_output=False, prime=None):
+        """Dimension 2 is decided exactly by the pebble game.
+        Otherwise set prime to use the exact modular backend instead of floating point ranks."""
+        exact = self.dimension == 2
+        self.compute_rigidity(sparse_output, prime)
         print("")
         n = self.number_of_vertices()
         m = self.number_of_edges()
@@ -72,8 +377,12 @@ class RigidityChecker(Graph):
             print(f"Graph is independent and flexible in dimension {self.dimension}.", flush=True)
         elif (self.independent is False) and (self.rigid is True):
             print(f"Graph is dependent and rigid in dimension {self.dimension}.", flush=True)
+        elif (self.independent is False) and (self.rigid is False) and exact:
+            print(f"Graph is dependent and flexible in dimension {self.dimension}.", flush=True)
         elif (self.independent is False) and (self.rigid is False):
             print(f"Graph is dependent and flexible in dimension {self.dimension}. Rerun to double check.", flush=True)
+        if prime is not None and not exact:
+            print(f"Probability of a false negative is at most {self.error_bound:.3g}.", flush=True)
 
 
 class GlobalRigidityChecker(RigidityChecker):
@@ -82,8 +391,21 @@ class GlobalRigidityChecker(RigidityChecker):
         super().__init__(graph_dict, dimension)
         self.globally_rigid = False
         self.globally_rigid_test_fail = False
+        self.certificate = None
 
-    def random_stress(self, matrix):
+    @stage
+    def random_stress(self, matrix, prime=None):
+        """Matrix can be a dense array or a scipy.sparse matrix.
+        A sparse matrix is only densified if the graph is flexible, and compute_global_rigidity never asks for the
+        stress of a flexible graph, which cannot be globally rigid.
+        If a prime is given, the matrix must be reduced modulo the prime and the stress is found modulo the prime."""
+        if prime is not None:
+            return random_modular_stress(matrix, prime)
+        if sparse.issparse(matrix):
+            stress = self.sparse_random_stress(matrix)
+            if stress is not None:
+                return stress
+            matrix = matrix.toarray()
         r2 = np.transpose(matrix)
         ns = null_space(r2)
 
@@ -97,32 +419,151 @@ class GlobalRigidityChecker(RigidityChecker):
             stress = np.zeros((self.number_of_edges(), 1))
         return stress
 
-    def stress_matrix(self, stress):
-        stress_matrix = np.zeros((self.number_of_vertices(), self.number_of_vertices()))
-        for v in range(self.number_of_vertices()):
-            for w in range(self.number_of_vertices()):
-                for e in self.edge_list():
-                    if v == w and v in e:
-                        stress_matrix[v][w] = stress_matrix[v][w] + stress[self.edge_list().index(e)]
-                    elif (v in e) and (w in e):
-                        stress_matrix[v][w] = -stress[self.edge_list().index(e)]
-        return stress_matrix
-
-    def stress_rank_check(self, stress):
-        stress_matrix = self.stress_matrix(stress)
-        rank = matrix_rank(stress_matrix)
-        if rank == self.number_of_vertices() - self.dimension - 1:
+    @stage
+    def sparse_random_stress(self, matrix):
+        """Random stress of a sparse rigidity matrix R of a rigid graph, without densifying it.
+        The stress is y - R'x for a random y, where R' is R with the pinned_columns and x solves the least squares
+        problem min |R'x - y|, from a sparse LU factorisation of the augmented system [[I, R'], [R'^T, 0]].
+        Returns None if the graph is flexible, when that system is singular."""
+        m = matrix.shape[0]
+        if m == 0:
+            return np.zeros((0, 1))
+        pinned = matrix.tocsc()[:, pinned_columns(self.number_of_vertices(), self.dimension)]
+        augmented = sparse.bmat([[sparse.identity(m), pinned], [pinned.T, None]], format="csc")
+        coefficients = np.array([random.randint(0, 100 * m) for _ in range(m)], dtype=float)
+        try:
+            solution = splu(augmented).solve(np.concatenate((coefficients, np.zeros(pinned.shape[1]))))
+        except RuntimeError:
+            return None
+        stress = solution[:m]
+        residual = abs(matrix.T @ stress).max() if pinned.shape[1] else 0.0
+        if not np.all(np.isfinite(stress)) or \
+                residual > np.sqrt(np.finfo(float).eps) * abs(stress).max() * abs(matrix).max():
+            return None
+        return stress[:, None]
+
+    @stage
+    def global_rigidity_trials(self, trials=10, batch_size=4):
+        """Like rigidity_trials, but also draws a random stress for each placement and keeps the placement with the
+        best pair of ranks. A stress matrix rank above n-d-1 or too close to call fails that trial, so it is never
+        kept over a trial with a clear rank. globally_rigid_test_fail is set if every trial of a rigid graph failed.
+        Sets independent, rigid and globally_rigid and returns a TrialResult."""
+        n = self.number_of_vertices()
+        d = self.dimension
+        stress_target = max(n - d - 1, 0)
+        rank_target = min(self.number_of_edges(), self.maximal_rank())
+        if self.number_of_edges() == 0:
+            run, (rank, stress_rank, passed) = 0, (0, 0, True)
+        else:
+            def batch_ranks(matrices):
+                ranks, stress_ranks, clear = batch_stress_ranks(matrices, self.incidence_matrix())
+                passed = clear & (stress_ranks <= stress_target)
+                # Score by rigidity matrix rank first and then by stress matrix rank, with failed trials lowest.
+                return ranks * (n + 2) + np.where(passed, stress_ranks + 1, 0), ranks, stress_ranks, passed
+            # Only a rigid graph can have a stress of the right rank, a flexible independent one has none.
+            stress_score = stress_target + 1 if rank_target == self.maximal_rank() else 1
+            run, (_, rank, stress_rank, passed) = self._batched_ranks(trials, batch_size, batch_ranks,
+                                                                      rank_target * (n + 2) + stress_score)
+        self.rank = rank
+        self.independent = rank == self.number_of_edges()
+        self.rigid = rank == self.maximal_rank()
+        self.globally_rigid = self.rigid and (n <= d + 1 or (passed and stress_rank == stress_target))
+        self.globally_rigid_test_fail = self.rigid and n > d + 1 and not passed
+        if self.globally_rigid or (rank == rank_target < self.maximal_rank()):
+            # Either certified, or there are too few edges for the graph to be rigid at all.
+            failure_bound = 0.0
+        elif rank_target < self.maximal_rank():
+            failure_bound = self.trial_failure_bound(rank_target, run)
+        else:
+            degree = self.maximal_rank() + stress_target * (self.maximal_rank() + 1)
+            failure_bound = self.trial_failure_bound(degree, run)
+        self.error_bound = failure_bound
+        return TrialResult(run, rank, self.maximal_rank(), self.independent, self.rigid, failure_bound,
+                           stress_rank if passed else None, self.globally_rigid)
+
+    @stage
+    def stress_matrix(self, stress, sparse_output=False):
+        """Stress matrix B^T diag(stress) B, where B is the signed incidence matrix.
+        Set sparse_output to True for a scipy.sparse CSR matrix instead of a dense array."""
+        incidence = self.incidence_matrix(sparse_output=True)
+        stress_matrix = incidence.T @ sparse.diags(np.ravel(stress)) @ incidence
+        if sparse_output:
+            return stress_matrix.tocsr()
+        return stress_matrix.toarray()
+
+    @stage
+    def stress_rank_check(self, stress, prime=None, sparse_output=False):
+        if prime is not None:
+            stress_matrix = modular_stress_matrix(self.edge_array(), self.number_of_vertices(), stress, prime)
+            rank = generic_rank(stress_matrix, prime)
+        else:
+            stress_matrix = self.stress_matrix(stress, sparse_output)
+            rank = symmetric_rank(stress_matrix, self.dimension + 2)
+        if rank is None:
+            # Some eigenvalue is too close to the zero line to tell, so nothing is certified.
+            self.globally_rigid = False
+            self.globally_rigid_test_fail = True
+        elif rank == self.number_of_vertices() - self.dimension - 1:
             self.globally_rigid = True
         elif (rank > self.number_of_vertices() - self.dimension - 1) and (rank > 0):
             self.globally_rigid_test_fail = True
         else:
             self.globally_rigid = False
 
-    def global_rigidity_check(self):
-        rigidity_matrix = self.random_rigidity_matrix()
-        self.rank_check(rigidity_matrix)
-        stress = self.random_stress(rigidity_matrix)
-        self.stress_rank_check(stress)
+    @stage
+    def combinatorial_global_rigidity_check(self):
+        """Exact global rigidity check in dimension 2 using 3-connectivity and redundant rigidity.
+        Sets certificate to the reason the graph is not globally rigid, if it is not.
+        Returns the finished GlobalRigidity2D."""
+        result = GlobalRigidity2D(self.adjacency_list)
+        self.rank = result.game.rank()
+        self.independent = result.game.independent()
+        self.rigid = result.rigid
+        self.globally_rigid = result.globally_rigid
+        self.globally_rigid_test_fail = False
+        self.certificate = result.certificate()
+        self.error_bound = 0.0
+        return result
+
+    @stage
+    def compute_global_rigidity(self, sparse_output=False, prime=None):
+        """Sets independent, rigid and globally_rigid without printing anything.
+        Dimension 2 is decided exactly by 3-connectivity and redundant rigidity.
+        Otherwise globally_rigid_test_fail is set instead if the stress matrix rank comes out too high,
+        and prime can be set to use the exact modular backend instead of floating point ranks."""
+        if self.dimension == 2:
+            self.combinatorial_global_rigidity_check()
+            return
+        self.globally_rigid = False
+        self.globally_rigid_test_fail = False
+        self.certificate = None
+        rigidity_matrix = self.random_rigidity_matrix(sparse_output, prime)
+        self.rank_check(rigidity_matrix, prime)
+        if self.rigid:
+            stress = self.random_stress(rigidity_matrix, prime)
+            self.stress_rank_check(stress, prime, sparse_output)
+        if prime is not None:
+            self.error_bound = global_rigidity_error_bound(self.target_rank(), self.number_of_vertices(),
+                                                           self.dimension, prime)
+        n = self.number_of_vertices()
+        m = self.number_of_edges()
+        if n < self.dimension + 1:
+            self.independent = True
+            self.rigid = 2 * m == n * (n - 1)
+            self.globally_rigid = self.rigid
+            self.globally_rigid_test_fail = False
+        elif self.globally_rigid_test_fail is True:
+            self.globally_rigid = False
+        elif (self.rigid is True) and (n <= self.dimension + 1):
+            self.globally_rigid = True
+        else:
+            self.globally_rigid = self.globally_rigid and self.rigid
+
+    def global_rigidity_check(self, sparse_output=False, prime=None):
+        """Dimension 2 is decided exactly by 3-connectivity and redundant rigidity.
+        Otherwise set prime to use the exact modular backend instead of floating point ranks."""
+        exact = self.dimension == 2
+        self.compute_global_rigidity(sparse_output, prime)
         print("")
         n = self.number_of_vertices()
         m = self.number_of_edges()
@@ -132,10 +573,15 @@ class GlobalRigidityChecker(RigidityChecker):
             else:
                 print(f"Graph is not globally rigid in dimension {self.dimension}.", flush=True)
         elif self.globally_rigid_test_fail is True:
-            print(f"Test failed: rank is too high.", flush=True)
+            print(f"Test failed: stress matrix rank is too high or too close to call. Rerun to double check.",
+                  flush=True)
         elif (self.rigid is True) and (self.number_of_vertices() <= self.dimension + 1):
             print(f"Graph is globally rigid in dimension {self.dimension}.", flush=True)
         elif (self.globally_rigid is True) and (self.rigid is True):
             print(f"Graph is globally rigid in dimension {self.dimension}.", flush=True)
+        elif exact:
+            print(f"Graph is not globally rigid in dimension {self.dimension}. {self.certificate}", flush=True)
         else:
             print(f"Graph is not globally rigid in dimension {self.dimension}. Rerun to double check.", flush=True)
+        if prime is not None and not exact:
+            print(f"Probability of a false negative is at most {self.error_bound:.3g}.", flush=True)
@@ -0,0 +1,114 @@
+"""Rigidity of a graph in every dimension up to a bound, in one sweep. Requires numpy.
+
+With its columns grouped by coordinate, the rigidity matrix in dimension d is [diag(x_1) B, ..., diag(x_d) B],
+where B is the signed incidence matrix and x_k holds the differences along the edges of the k-th coordinates.
+So the placement in dimension d + 1 is taken to be the one in dimension d with one more random coordinate, and the
+rank in dimension d + 1 is the rank in dimension d plus the rank of the new block modulo the columns before it.
+The sweep keeps a basis of the column space found so far (orthonormal, or in reduced pivot form modulo a prime)
+and only reduces each new block against it, so all the dimensions together cost about as much as one check in
+the largest. Once every edge is independent, the larger dimensions need no work at all."""
+
+import numpy as np
+from modular_rigidity import eliminate, maximal_rank, random_modular_placement, rigidity_error_bound
+
+
+class RigidityProfile:
+    """Generic rank, independence, rigidity and stress space dimension of a graph in the dimensions 1,...,D.
+    smallest_flexible_dimension is the first dimension in which the graph is flexible, or None if it is rigid in all
+    of them. error_bound bounds the probability that any rank is below the generic rank, if a prime was used."""
+
+    def __init__(self, n, m, ranks, error_bound=None):
+        self.dimensions = list(range(1, len(ranks) + 1))
+        self.ranks = ranks
+        self.maximal_ranks = [maximal_rank(n, d) for d in self.dimensions]
+        self.independent = [rank == m for rank in ranks]
+        self.rigid = [rank == maximal for rank, maximal in zip(ranks, self.maximal_ranks)]
+        self.stress_dimensions = [m - rank for rank in ranks]
+        self.smallest_flexible_dimension = next((d for d, rigid in zip(self.dimensions, self.rigid) if not rigid),
+                                                None)
+        self.error_bound = error_bound
+
+    def __repr__(self):
+        return (f"RigidityProfile(ranks={self.ranks}, rigid={self.rigid}, independent={self.independent}, "
+                f"stress_dimensions={self.stress_dimensions}, "
+                f"smallest_flexible_dimension={self.smallest_flexible_dimension})")
+
+    def format_table(self):
+        lines = [f"{'d':>3}{'rank':>8}{'maximal':>9}{'stresses':>10}  status"]
+        for d, rank, maximal, stresses, independent, rigid in zip(
+                self.dimensions, self.ranks, self.maximal_ranks, self.stress_dimensions, self.independent,
+                self.rigid):
+            status = ("independent and " if independent else "dependent and ") + ("rigid" if rigid else "flexible")
+            lines.append(f"{d:>3}{rank:>8}{maximal:>9}{stresses:>10}  {status}")
+        return "\n".join(lines)
+
+
+def _float_ranks(incidence, edges, placement):
+    """Ranks of [diag(x_1) B, ..., diag(x_d) B] for d = 1,...,D, where x_k holds the differences of the k-th column
+    of the (n, D) placement along the edges."""
+    m, n = incidence.shape
+    max_dimension = placement.shape[1]
+    differences = placement[edges[:, 0]] - placement[edges[:, 1]]
+    basis = np.zeros((m, 0))
+    squared_norm = 0.0
+    ranks = []
+    for d in range(1, max_dimension + 1):
+        if basis.shape[1] < m:
+            block = differences[:, d - 1:d] * incidence
+            squared_norm += np.sum(block ** 2)
+            # Projecting out the basis twice keeps the new directions orthogonal to it to working precision.
+            for _ in range(2):
+                block -= basis @ (basis.T @ block)
+            left, singular_values, _ = np.linalg.svd(block, full_matrices=False)
+            tol = np.sqrt(squared_norm) * max(m, d * n) * np.finfo(float).eps
+            basis = np.hstack((basis, left[:, singular_values > tol]))
+        ranks.append(basis.shape[1])
+    return ranks
+
+
+def _modular_ranks(incidence, edges, placement, prime):
+    """Like _float_ranks, but exactly modulo prime. The basis of the column space is kept as rows in reduced pivot
+    form, so a new column is reduced by clearing its entries in the pivot positions."""
+    m, n = incidence.shape
+    max_dimension = placement.shape[1]
+    differences = (placement[edges[:, 0]] - placement[edges[:, 1]]) % prime
+    basis = np.zeros((0, m), dtype=np.int64)
+    pivots = []
+    ranks = []
+    for d in range(1, max_dimension + 1):
+        if len(pivots) < m:
+            rows = (differences[:, d - 1] * incidence.T) % prime
+            # One pivot at a time, so the products never overflow.
+            for pivot, basis_row in zip(pivots, basis):
+                rows = (rows - rows[:, pivot:pivot + 1] * basis_row) % prime
+            reduced, new_pivots = eliminate(rows, prime, True)
+            reduced = reduced[:len(new_pivots)]
+            for pivot, new_row in zip(new_pivots, reduced):
+                basis = (basis - basis[:, pivot:pivot + 1] * new_row) % prime
+            basis = np.vstack((basis, reduced))
+            pivots.extend(new_pivots)
+        ranks.append(len(pivots))
+    return ranks
+
+
+def sweep_dimensions(graph, max_dimension=None, prime=None):
+    """RigidityProfile of the graph (a Graph or CompactGraph) in the dimensions 1,...,max_dimension, from one random
+    placement in dimension max_dimension whose first d coordinates are used in dimension d.
+    max_dimension defaults to n - 1, beyond which a graph is only rigid if it is complete.
+    If a prime is given, the ranks are exact modulo the prime and an error bound is reported."""
+    n = graph.number_of_vertices()
+    edges = graph.edge_array()
+    m = len(edges)
+    if max_dimension is None:
+        max_dimension = max(n - 1, 1)
+    incidence = np.zeros((m, n), dtype=np.int64 if prime is not None else float)
+    incidence[np.arange(m), edges[:, 0]] = 1
+    incidence[np.arange(m), edges[:, 1]] = -1
+    if prime is not None:
+        placement = random_modular_placement(n, max_dimension, prime)
+        ranks = _modular_ranks(incidence, edges, placement, prime)
+        error_bound = min(1.0, sum(rigidity_error_bound(min(m, maximal_rank(n, d)), prime)
+                                   for d in range(1, max_dimension + 1)))
+        return RigidityProfile(n, m, ranks, error_bound)
+    placement = np.random.randint(0, 100 * n + 1, size=(n, max_dimension)).astype(float)
+    return RigidityProfile(n, m, _float_ranks(incidence, edges, placement))
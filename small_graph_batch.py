@@ -0,0 +1,97 @@
+"""Rigidity and global rigidity of many small graphs at once. Requires numpy and scipy.
+
+For graphs with a dozen or so vertices the Python overhead of building one RigidityChecker per graph costs more than
+the linear algebra, so here the rigidity and stress matrices of a whole batch of graphs are built as one 3D array
+and their ranks are found with batched numpy.linalg calls.
+Graphs of different sizes are padded to a common size with zero rows and columns, which do not change any rank."""
+
+from itertools import islice
+
+import numpy as np
+from graph import Graph
+from modular_rigidity import maximal_rank
+from rigidity_checker import batch_stress_ranks
+
+EPSILON = np.finfo(float).eps
+
+
+def _edge_data(graphs):
+    """Vertex counts, edge counts and a padded (B, M, 2) edge array of the graphs, which can be adjacency lists
+    or objects with number_of_vertices and edge_array methods such as Graph and CompactGraph."""
+    sizes = []
+    edge_arrays = []
+    for graph in graphs:
+        if not hasattr(graph, "edge_array"):
+            graph = Graph({vertex: set(graph[vertex]) for vertex in graph})
+        sizes.append(graph.number_of_vertices())
+        edge_arrays.append(graph.edge_array())
+    vertices = np.array(sizes, dtype=np.int64)
+    edges = np.array([len(edge_array) for edge_array in edge_arrays], dtype=np.int64)
+    padded = np.zeros((len(edge_arrays), max(edges, default=0), 2), dtype=np.int64)
+    for b, edge_array in enumerate(edge_arrays):
+        padded[b, :len(edge_array)] = edge_array
+    return vertices, edges, padded
+
+
+def _ranks(singular_values, tolerance):
+    """Number of singular values of each matrix above tolerance times its largest singular value."""
+    if singular_values.shape[-1] == 0:
+        return np.zeros(singular_values.shape[:-1], dtype=np.int64)
+    return np.count_nonzero(singular_values > singular_values.max(axis=-1, keepdims=True) * tolerance, axis=-1)
+
+
+def _check_chunk(graphs, dimension, global_rigidity):
+    d = dimension
+    vertices, edges, edge_array = _edge_data(graphs)
+    size, m, _ = edge_array.shape
+    n = int(vertices.max(initial=0))
+    real_edges = (np.arange(m) < edges[:, None]).astype(float)
+    u, v = edge_array[..., 0], edge_array[..., 1]
+    batch = np.arange(size)[:, None]
+
+    placements = np.random.randint(0, 100 * max(n, 1) + 1, size=(size, n, d)).astype(float)
+    difference = (placements[batch, u] - placements[batch, v]) * real_edges[..., None]
+    columns = np.concatenate((d * u[..., None] + np.arange(d), d * v[..., None] + np.arange(d)), axis=-1)
+    rigidity_matrices = np.zeros((size, m, d * n))
+    rigidity_matrices[batch[..., None], np.arange(m)[:, None], columns] = np.concatenate((difference, -difference),
+                                                                                        axis=-1)
+    if not global_rigidity:
+        ranks = _ranks(np.linalg.svd(rigidity_matrices, compute_uv=False), max(m, d * n) * EPSILON)
+        return vertices, edges, ranks, np.zeros(size, dtype=np.int64), np.ones(size, dtype=bool)
+
+    incidence = np.zeros((size, m, n))
+    incidence[batch, np.arange(m), u] = real_edges
+    incidence[batch, np.arange(m), v] = -real_edges
+    ranks, stress_ranks, clear = batch_stress_ranks(rigidity_matrices, incidence)
+    return vertices, edges, ranks, stress_ranks, clear
+
+
+def _check(graphs, dimension, global_rigidity, batch_size):
+    graphs = iter(graphs)
+    results = [[np.zeros(0, dtype=np.int64)] for _ in range(4)] + [[np.zeros(0, dtype=bool)]]
+    while True:
+        chunk = list(islice(graphs, batch_size))
+        if not chunk:
+            break
+        for result, chunk_result in zip(results, _check_chunk(chunk, dimension, global_rigidity)):
+            result.append(chunk_result)
+    vertices, edges, ranks, stress_ranks, clear = (np.concatenate(result) for result in results)
+    independent = ranks == edges
+    rigid = ranks == maximal_rank(vertices, dimension)
+    if not global_rigidity:
+        return independent, rigid
+    globally_rigid = rigid & ((vertices <= dimension + 1) | (clear & (stress_ranks == vertices - dimension - 1)))
+    return independent, rigid, globally_rigid
+
+
+def batch_rigidity(graphs, dimension, batch_size=4096):
+    """Boolean arrays (independent, rigid), one entry per graph, from one random placement of each graph.
+    Graphs are processed batch_size at a time to bound memory."""
+    return _check(graphs, dimension, False, batch_size)
+
+
+def batch_global_rigidity(graphs, dimension, batch_size=4096):
+    """Boolean arrays (independent, rigid, globally_rigid), one entry per graph, from one random placement and one
+    random stress of each graph. A graph whose stress matrix rank is too close to call counts as not globally rigid.
+    Graphs are processed batch_size at a time to bound memory."""
+    return _check(graphs, dimension, True, batch_size)
@@ -4,14 +4,14 @@ from pygame.sprite import Sprite
 
 class Vertex(Sprite):
 
+    size = 30
+
     def __init__(self, gb_game):
         super().__init__()
         self.screen = gb_game.screen
 
         self.color = (0, 0, 0)
 
-        self.size = 30
-
         self.name = 0
 
         self.rect = pygame.Rect(0, 0, self.size, self.size)